@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+LICENSE  MulanPSL2
+@author  cnhemiya@qq.com
+@date    2026-10-17 11:40
+
+@brief 对比 image_match 与 image_match_pyramid 的速度和准确率。
+
+用法: python benchmarks/bench_image_match.py [--width 1440] [--height 2560] [--runs 20]
+需要 bmmpy 所在目录在 sys.path 中，见 docs/bmmpy.pth。
+"""
+
+
+import argparse
+import time
+import numpy as np
+import cv2
+from bmmpy import bmmimage
+
+
+def make_frame(width: int, height: int, seed: int) -> np.ndarray:
+    # 模糊后的随机噪声，近似有纹理的界面截图
+    rng = np.random.default_rng(seed)
+    frame = (rng.random((height, width)) * 255).astype(np.uint8)
+    return cv2.GaussianBlur(frame, (7, 7), 3)
+
+
+def bench(func, runs: int, *args, **kwargs):
+    func(*args, **kwargs)
+    start = time.perf_counter()
+    for _ in range(runs):
+        result = func(*args, **kwargs)
+    return (time.perf_counter() - start) / runs * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="image_match 金字塔模式基准测试")
+    parser.add_argument("--width", type=int, default=1440)
+    parser.add_argument("--height", type=int, default=2560)
+    parser.add_argument("--template", type=int, default=96, help="模板边长")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--cases", type=int, default=10, help="随机模板位置数量")
+    args = parser.parse_args()
+
+    frame = make_frame(args.width, args.height, 0)
+    rng = np.random.default_rng(1)
+    t = args.template
+    positions = [(int(rng.integers(0, args.width - t)), int(rng.integers(0, args.height - t)))
+                 for _ in range(args.cases)]
+
+    print(f"frame {args.width}x{args.height}, template {t}x{t}, {args.runs} runs x {args.cases} cases")
+    print(f"{'mode':<24}{'ms/match':>10}{'hit rate':>10}")
+    modes = [("exhaustive", None)] + [(f"pyramid levels={n}", n) for n in (1, 2, 3)]
+    for name, levels in modes:
+        total, hits = 0.0, 0
+        for x, y in positions:
+            template = frame[y:y + t, x:x + t].copy()
+            if levels is None:
+                ms, (top_left, _) = bench(bmmimage.image_match, args.runs, frame, template)
+            else:
+                ms, (top_left, _, _) = bench(bmmimage.image_match_pyramid, args.runs, frame, template,
+                                             levels=levels)
+            total += ms
+            hits += top_left == (x, y)
+        print(f"{name:<24}{total / len(positions):>10.2f}{hits / len(positions):>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
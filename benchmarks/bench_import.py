@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+LICENSE  MulanPSL2
+@author  cnhemiya@qq.com
+@date    2026-10-17 16:40
+
+@brief 用 python -X importtime 统计导入每个 bmmpy 模块的耗时，以及是否加载了重量级依赖。
+
+用法: python benchmarks/bench_import.py [--runs 5] [bmmhash bmmfile ...]
+需要 bmmpy 所在目录在 sys.path 中，见 docs/bmmpy.pth。
+"""
+
+
+import sys
+import argparse
+import subprocess
+
+
+MODULES = ["bmmpy", "bmmpy.bmmcheck", "bmmpy.bmmhash", "bmmpy.bmmfile", "bmmpy.bmmstring",
+           "bmmpy.bmmdatetime", "bmmpy.bmmhttp", "bmmpy.bmmraw", "bmmpy.bmmimage",
+           "bmmpy.bmmmatch", "bmmpy.bmmtemplate", "bmmpy.bmmphash", "bmmpy.bmmedges",
+           "bmmpy.adbhelper.adbutils"]
+
+HEAVY = ("typeguard", "numpy", "cv2")
+
+
+def import_time(module: str) -> tuple[int, list[str]]:
+    """
+    在新的解释器中导入 module。
+
+    Returns:
+        tuple: (module 的累计导入耗时（微秒），不含解释器启动, 加载了的重量级依赖)。
+    """
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          check=True, capture_output=True, text=True)
+    total = 0
+    loaded = []
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = line[len("import time:"):].split("|")
+        if not line.startswith("import time:") or len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].strip()
+        if name == module:
+            total = int(parts[1])
+        elif name in HEAVY:
+            loaded.append(name)
+    return total, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="bmmpy 模块导入耗时")
+    parser.add_argument("--runs", type=int, default=5, help="每个模块运行次数，取最小值")
+    parser.add_argument("modules", nargs="*", help="模块名，如 bmmhash，默认全部")
+    args = parser.parse_args()
+    modules = [m if m.startswith("bmmpy") else f"bmmpy.{m}" for m in args.modules] or MODULES
+
+    print(f"{'模块':<28}{'耗时(ms)':>10}  重量级依赖")
+    for module in modules:
+        results = [import_time(module) for _ in range(args.runs)]
+        total = min(r[0] for r in results)
+        loaded = results[0][1]
+        print(f"{module:<28}{total / 1000:>10.1f}  {', '.join(loaded) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+LICENSE  MulanPSL2
+@author  cnhemiya@qq.com
+@date    2026-10-17 16:10
+
+@brief 对比开启和关闭运行时类型检查（BMMPY_TYPECHECK）时的单次调用耗时。
+
+用法: python benchmarks/bench_typecheck.py [--runs 20000]
+需要 bmmpy 所在目录在 sys.path 中，见 docs/bmmpy.pth。
+"""
+
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+
+def bench(func, runs: int, *args) -> float:
+    func(*args)
+    start = time.perf_counter()
+    for _ in range(runs):
+        func(*args)
+    return (time.perf_counter() - start) / runs * 1e6
+
+
+def child(runs: int) -> None:
+    # 在子进程中运行，类型检查开关在导入 bmmpy 模块时生效
+    import numpy as np
+    from bmmpy import bmmstring, bmmhash, bmmimage
+
+    src = np.zeros((64, 64), dtype=np.uint8)
+    src[20:30, 20:30] = 255
+    tmpl = src[16:34, 16:34].copy()
+    words = {f"key{i}": f"value{i}" for i in range(8)}
+    result = {
+        "replace_string_by_dict": bench(bmmstring.replace_string_by_dict, runs, "key1 key2 other", words),
+        "str2int_list": bench(bmmstring.str2int_list, runs, "1,2,3,4,5"),
+        "md5_string": bench(bmmhash.md5_string, runs, "hello"),
+        "image_match": bench(bmmimage.image_match, max(runs // 10, 1), src, tmpl),
+    }
+    print(json.dumps(result))
+
+
+def run_child(runs: int, enabled: bool) -> dict:
+    env = dict(os.environ, BMMPY_TYPECHECK="1" if enabled else "0")
+    out = subprocess.run([sys.executable, __file__, "--child", "--runs", str(runs)], env=env,
+                         check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="运行时类型检查开销基准测试")
+    parser.add_argument("--runs", type=int, default=20000)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.runs)
+        return
+
+    checked = run_child(args.runs, True)
+    unchecked = run_child(args.runs, False)
+    print(f"{'函数':<24}{'检查(us)':>12}{'不检查(us)':>12}{'节省(us)':>12}")
+    for name in checked:
+        print(f"{name:<24}{checked[name]:>12.2f}{unchecked[name]:>12.2f}"
+              f"{checked[name] - unchecked[name]:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+LICENSE  MulanPSL2
+@author  cnhemiya@qq.com
+@date    2026-10-17 16:30
+
+@brief 苞米面 Python 库。
+
+子模块在第一次访问时才导入，import bmmpy 不会加载 OpenCV、NumPy 和 typeguard:
+    >>> import bmmpy
+    >>> bmmpy.bmmhash.md5_string("hello")
+"""
+
+
+import importlib
+
+
+_SUBMODULES = (
+    "adbhelper",
+    "bmmcheck",
+    "bmmdatetime",
+    "bmmedges",
+    "bmmfile",
+    "bmmhash",
+    "bmmhttp",
+    "bmmimage",
+    "bmmindex",
+    "bmminput",
+    "bmmmatch",
+    "bmmphash",
+    "bmmraw",
+    "bmmreplace",
+    "bmmstring",
+    "bmmtemplate",
+)
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_SUBMODULES))
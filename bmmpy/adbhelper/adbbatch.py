@@ -0,0 +1,114 @@
+# -*    coding: utf-8 -*-
+
+# input 事件类型和代码，见 linux/input-event-codes.h
+EV_SYN = 0
+EV_KEY = 1
+EV_ABS = 3
+SYN_REPORT = 0
+BTN_TOUCH = 330
+ABS_MT_POSITION_X = 53
+ABS_MT_POSITION_Y = 54
+ABS_MT_TRACKING_ID = 57
+
+
+class InputBatch:
+    """
+    输入事件批处理
+    把一串输入动作拼成一个 shell 脚本，一次发送到设备执行，
+    只需要一次往返。批处理对象可以重复执行。
+    例子:
+        batch = InputBatch(delay=0.1)
+        batch.touch(500, 800).sendText("hello").pressKey(keycode.ENTER)
+        batch.run(adb)
+    """
+
+    def __init__(self, delay=0):
+        """ delay: 每个动作之后的默认等待秒数，0 表示不等待 """
+        self.__delay = delay
+        self.__lines = []
+
+    def __len__(self):
+        return len(self.__lines)
+
+    def __add(self, line, delay=None):
+        self.__lines.append(line)
+        if delay is None:
+            delay = self.__delay
+        if delay > 0:
+            self.__lines.append("sleep %s" % str(delay))
+        return self
+
+    def clear(self):
+        """ 清空所有动作 """
+        self.__lines = []
+        return self
+
+    def script(self):
+        """ 生成 shell 脚本 """
+        return "\n".join(self.__lines)
+
+    def sleep(self, seconds):
+        """ 等待 seconds 秒 """
+        return self.__add("sleep %s" % str(seconds), 0)
+
+    def pressKey(self, keycode, delay=None):
+        """ 发送一个按键事件 """
+        return self.__add("input keyevent %s" % str(keycode), delay)
+
+    def longPressKey(self, keycode, delay=None):
+        """ 发送一个按键长按事件，Android 4.4以上 """
+        return self.__add("input keyevent --longpress %s" % str(keycode), delay)
+
+    def touch(self, x, y, delay=None):
+        """ 点击屏幕的某个坐标位置 """
+        return self.__add("input tap %s %s" % (str(x), str(y)), delay)
+
+    def swipe(self, start_x, start_y, end_x, end_y, duration="", delay=None):
+        """ 滑动事件，Android 4.4以上可选 duration(ms)(持续时间) """
+        return self.__add("input swipe %s %s %s %s %s" % (str(start_x), str(start_y), str(end_x),
+                                                          str(end_y), str(duration)), delay)
+
+    def longTouch(self, x, y, duration=1000, delay=None):
+        """ 长按屏幕的某个坐标位置，duration(ms)(持续时间) """
+        return self.swipe(x, y, x, y, duration, delay)
+
+    def sendText(self, txt, delay=None):
+        """ 发送一段文本 """
+        return self.__add("input text %s" % txt, delay)
+
+    def sendEvent(self, device, event_type, code, value):
+        """
+        写入一个原始 input 事件，需要 root 或 shell 有 /dev/input 写权限
+        例子: sendEvent("/dev/input/event2", EV_KEY, BTN_TOUCH, 1)
+        """
+        self.__lines.append("sendevent %s %d %d %d" % (device, event_type, code, value))
+        return self
+
+    def rawTouch(self, device, x, y, delay=None):
+        """
+        通过 sendevent 直接写触摸屏事件（多点触控协议 B）
+        x, y 是触摸屏的原始坐标，范围见 getevent -p，不一定等于屏幕分辨率
+        """
+        self.sendEvent(device, EV_ABS, ABS_MT_TRACKING_ID, 0)
+        self.sendEvent(device, EV_ABS, ABS_MT_POSITION_X, x)
+        self.sendEvent(device, EV_ABS, ABS_MT_POSITION_Y, y)
+        self.sendEvent(device, EV_KEY, BTN_TOUCH, 1)
+        self.sendEvent(device, EV_SYN, SYN_REPORT, 0)
+        # 抬起用 -1，旧版 toolbox 的 sendevent 用 atoi 解析，写 4294967295 在 32 位设备上会被截成 0x7fffffff
+        self.sendEvent(device, EV_ABS, ABS_MT_TRACKING_ID, -1)
+        self.sendEvent(device, EV_KEY, BTN_TOUCH, 0)
+        return self.__add("sendevent %s %d %d %d" % (device, EV_SYN, SYN_REPORT, 0), delay)
+
+    def run(self, adb, times=1):
+        """
+        在设备上执行，times 为重复次数
+        整个脚本只发送一次，结束后按 adb.pacing 等待一次，返回脚本输出
+        """
+        script = self.script()
+        if script == "":
+            return ""
+        if times > 1:
+            script = "for _i in %s; do\n%s\ndone" % (" ".join(["x"] * times), script)
+        result = adb.shellScript(script)
+        adb.pacing.wait(adb)
+        return result
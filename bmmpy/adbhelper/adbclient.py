@@ -0,0 +1,221 @@
+# -*    coding: utf-8 -*-
+
+import io
+import socket
+import struct
+import threading
+import contextlib
+
+
+class AdbClient:
+    """
+    adb server 客户端，直接使用 smart socket 协议与 adb server 通信，
+    不再启动 adb 程序。
+    shell: / exec: 连接由 server 在命令结束后关闭，只能用一次；
+    sync: 连接可重复使用，按设备放入连接池。
+    """
+
+    SYNC_DATA_MAX = 64 * 1024
+    REQUEST_MAX = 0xFFFF        # 请求长度用 4 位十六进制表示
+
+    def __init__(self, host="127.0.0.1", port=5037, timeout=None):
+        self.__host = host
+        self.__port = port
+        self.__timeout = timeout
+        self.__syncPool = {}
+        self.__lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def host(self):
+        """ host 属性 读 """
+        return self.__host
+
+    @property
+    def port(self):
+        """ port 属性 读 """
+        return self.__port
+
+    def __connect(self):
+        sock = socket.create_connection((self.__host, self.__port), timeout=self.__timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    @staticmethod
+    def __recvExactly(sock, size):
+        buf = bytearray(size)
+        view = memoryview(buf)
+        pos = 0
+        while pos < size:
+            n = sock.recv_into(view[pos:])
+            if n == 0:
+                raise ConnectionError("adb server 连接已关闭")
+            pos += n
+        return bytes(buf)
+
+    @staticmethod
+    def __recvAll(sock):
+        chunks = []
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                break
+            chunks.append(data)
+        return b"".join(chunks)
+
+    def __sendRequest(self, sock, request):
+        data = request.encode("utf8")
+        if len(data) > self.REQUEST_MAX:
+            raise ValueError("adb 请求过长: %d 字节，最多 %d 字节" % (len(data), self.REQUEST_MAX))
+        sock.sendall(b"%04x" % len(data) + data)
+        status = self.__recvExactly(sock, 4)
+        if status == b"OKAY":
+            return
+        if status == b"FAIL":
+            size = int(self.__recvExactly(sock, 4), 16)
+            msg = str(self.__recvExactly(sock, size), encoding="utf8", errors="replace")
+            raise RuntimeError("adb server 错误: %s" % msg)
+        raise RuntimeError("adb server 返回未知状态: %r" % status)
+
+    def hostCommand(self, request):
+        """
+        执行 host: 命令，返回结果文本
+        例子: hostCommand("host:version")
+        """
+        with contextlib.closing(self.__connect()) as sock:
+            self.__sendRequest(sock, request)
+            size = int(self.__recvExactly(sock, 4), 16)
+            return str(self.__recvExactly(sock, size), encoding="utf8", errors="replace")
+
+    def devices(self):
+        """ 获取设备列表，格式与 AdbUtils.deviceList() 相同 """
+        result = []
+        for line in self.hostCommand("host:devices").splitlines():
+            a = line.split("\t")
+            if len(a) >= 2:
+                result.append([a[0], a[1]])
+        return result
+
+    def openService(self, serial, service):
+        """
+        切换到设备并打开服务，返回已连接的 socket，由调用者关闭
+        serial 为空时使用唯一连接的设备
+        例子: openService("emulator-5554", "exec:screencap")
+        """
+        sock = self.__connect()
+        try:
+            if serial != "":
+                self.__sendRequest(sock, "host:transport:%s" % serial)
+            else:
+                self.__sendRequest(sock, "host:transport-any")
+            self.__sendRequest(sock, service)
+        except BaseException:
+            sock.close()
+            raise
+        return sock
+
+    def shell(self, serial, cmd):
+        """ 执行 shell: 命令，返回输出字节 """
+        with contextlib.closing(self.openService(serial, "shell:%s" % cmd)) as sock:
+            return self.__recvAll(sock)
+
+    def execOut(self, serial, cmd):
+        """ 执行 exec: 命令，返回原始输出字节，适合读取二进制数据 """
+        with contextlib.closing(self.openService(serial, "exec:%s" % cmd)) as sock:
+            return self.__recvAll(sock)
+
+    @contextlib.contextmanager
+    def syncConnection(self, serial):
+        """
+        从连接池取出一个 sync: 连接，用完放回
+        出错的连接直接关闭，不放回连接池
+        """
+        with self.__lock:
+            pool = self.__syncPool.setdefault(serial, [])
+            sock = pool.pop() if pool else None
+        if sock is None:
+            sock = self.openService(serial, "sync:")
+        try:
+            yield sock
+        except BaseException:
+            sock.close()
+            raise
+        with self.__lock:
+            self.__syncPool.setdefault(serial, []).append(sock)
+
+    @staticmethod
+    def __syncSend(sock, sync_id, data):
+        sock.sendall(sync_id + struct.pack("<I", len(data)) + data)
+
+    def __syncFail(self, sock):
+        size = struct.unpack("<I", self.__recvExactly(sock, 4))[0]
+        msg = str(self.__recvExactly(sock, size), encoding="utf8", errors="replace")
+        raise RuntimeError("adb sync 错误: %s" % msg)
+
+    def stat(self, serial, remote_path):
+        """ 获取设备文件信息，返回 (mode, size, mtime)，文件不存在时 mode 为 0 """
+        with self.syncConnection(serial) as sock:
+            self.__syncSend(sock, b"STAT", remote_path.encode("utf8"))
+            if self.__recvExactly(sock, 4) != b"STAT":
+                raise RuntimeError("adb sync STAT 响应错误")
+            return struct.unpack("<III", self.__recvExactly(sock, 12))
+
+    def pull(self, serial, remote_path, local_path):
+        """ 从设备拉取文件到电脑 """
+        with self.syncConnection(serial) as sock, open(local_path, "wb") as f:
+            self.__syncSend(sock, b"RECV", remote_path.encode("utf8"))
+            while True:
+                sync_id = self.__recvExactly(sock, 4)
+                if sync_id == b"DATA":
+                    size = struct.unpack("<I", self.__recvExactly(sock, 4))[0]
+                    f.write(self.__recvExactly(sock, size))
+                elif sync_id == b"DONE":
+                    self.__recvExactly(sock, 4)
+                    break
+                elif sync_id == b"FAIL":
+                    self.__syncFail(sock)
+                else:
+                    raise RuntimeError("adb sync RECV 响应错误: %r" % sync_id)
+
+    def __pushStream(self, serial, f, remote_path, mode, mtime):
+        with self.syncConnection(serial) as sock:
+            self.__syncSend(sock, b"SEND", ("%s,%d" % (remote_path, mode)).encode("utf8"))
+            while True:
+                data = f.read(self.SYNC_DATA_MAX)
+                if not data:
+                    break
+                self.__syncSend(sock, b"DATA", data)
+            sock.sendall(b"DONE" + struct.pack("<I", mtime))
+            sync_id = self.__recvExactly(sock, 4)
+            if sync_id == b"FAIL":
+                self.__syncFail(sock)
+            if sync_id != b"OKAY":
+                raise RuntimeError("adb sync SEND 响应错误: %r" % sync_id)
+            self.__recvExactly(sock, 4)
+
+    def push(self, serial, local_path, remote_path, mode=0o644, mtime=0):
+        """ 从电脑推送文件到设备 """
+        with open(local_path, "rb") as f:
+            self.__pushStream(serial, f, remote_path, mode, mtime)
+
+    def pushData(self, serial, data, remote_path, mode=0o644, mtime=0):
+        """ 把内存中的字节推送为设备上的文件 """
+        self.__pushStream(serial, io.BytesIO(data), remote_path, mode, mtime)
+
+    def close(self):
+        """ 关闭连接池中的所有连接 """
+        with self.__lock:
+            pools = list(self.__syncPool.values())
+            self.__syncPool = {}
+        for pool in pools:
+            for sock in pool:
+                try:
+                    self.__syncSend(sock, b"QUIT", b"")
+                except OSError:
+                    pass
+                sock.close()
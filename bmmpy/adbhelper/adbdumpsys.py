@@ -0,0 +1,71 @@
+# -*    coding: utf-8 -*-
+
+import re
+
+# 只取需要的部分，grep 在设备端执行，减少传输和解析的数据量
+CMD_BATTERY = "dumpsys battery"
+CMD_FOCUS = "dumpsys window windows | grep -E 'mCurrentFocus|mFocusedApp'"
+CMD_DISPLAY = "dumpsys display | grep -E 'mStableDisplaySize|DisplayDeviceInfo'"
+
+# 预编译的提取规则
+BATTERY_RE = re.compile(r"^[ \t]+([^:\r\n]+):[ \t]*(.*?)[ \t]*\r?$", re.M)
+FOCUS_RE = re.compile(r"mCurrentFocus=Window\{\S+ \S+ ([^\s}]*)\}")
+FOCUSED_APP_RE = re.compile(r"mFocusedApp=\S*\{\S+ \S+ ([^\s}]+)")
+POINT_RE = re.compile(r"(\w+)=Point\((\d+), (\d+)\)")
+DISPLAY_DEVICE_RE = re.compile(r"DisplayDeviceInfo\{\"([^\"]*)\": (?:[^,]*, )?(\d+) x (\d+)")
+
+
+def _toValue(txt):
+    try:
+        return int(txt)
+    except ValueError:
+        pass
+    if txt == "true":
+        return True
+    if txt == "false":
+        return False
+    return txt
+
+
+def parseBattery(txt, typed=False):
+    """
+    解析 dumpsys battery 输出为字典
+    typed=True 时数字转为 int，true/false 转为 bool，否则保持字符串
+    例子: parseBattery(txt)["level"] -> "87"
+    """
+    result = {}
+    for key, val in BATTERY_RE.findall(txt):
+        result[key] = _toValue(val) if typed else val
+    return result
+
+
+def parseFocus(txt):
+    """
+    解析 dumpsys window 输出中当前焦点窗口，返回 (package, activity)
+    焦点不是 Activity 窗口时 activity 为空，找不到时都为空
+    """
+    m = FOCUS_RE.search(txt)
+    if m is None:
+        m = FOCUSED_APP_RE.search(txt)
+    if m is None:
+        return "", ""
+    pa = m.group(1).split("/", 1)
+    if len(pa) == 1:
+        return pa[0], ""
+    return pa[0], pa[1]
+
+
+def parseDisplay(txt):
+    """
+    解析 dumpsys display 输出
+    返回字典：Point 类型的字段为 (x, y)，如 mStableDisplaySize；
+    显示设备为 {"devices": {name: (width, high)}}
+    """
+    result = {}
+    for key, x, y in POINT_RE.findall(txt):
+        result.setdefault(key, (int(x), int(y)))
+    devices = {}
+    for name, w, h in DISPLAY_DEVICE_RE.findall(txt):
+        devices.setdefault(name, (int(w), int(h)))
+    result["devices"] = devices
+    return result
@@ -0,0 +1,194 @@
+# -*    coding: utf-8 -*-
+
+import threading
+import time
+from .adbutils import AdbUtils
+
+
+class DeviceResult:
+    """ 单个设备的执行结果 """
+
+    __slots__ = ("serial", "value", "error", "elapsed", "timedOut")
+
+    def __init__(self, serial, value=None, error=None, elapsed=0.0, timed_out=False):
+        self.serial = serial
+        self.value = value
+        self.error = error
+        self.elapsed = elapsed
+        self.timedOut = timed_out
+
+    @property
+    def ok(self):
+        """ 是否执行成功 """
+        return self.error is None
+
+    def __repr__(self):
+        if self.ok:
+            return "DeviceResult(%r, value=%r, elapsed=%.3f)" % (self.serial, self.value, self.elapsed)
+        return "DeviceResult(%r, error=%r, elapsed=%.3f)" % (self.serial, self.error, self.elapsed)
+
+
+class FleetResult:
+    """ 所有设备的执行结果，按设备序列号索引 """
+
+    def __init__(self, results):
+        self.__results = results
+
+    def __getitem__(self, serial):
+        return self.__results[serial]
+
+    def __iter__(self):
+        return iter(self.__results.values())
+
+    def __len__(self):
+        return len(self.__results)
+
+    def __repr__(self):
+        return "FleetResult(%r)" % list(self.__results.values())
+
+    @property
+    def ok(self):
+        """ 是否所有设备都执行成功 """
+        return all(r.ok for r in self.__results.values())
+
+    def values(self):
+        """ 成功设备的返回值 {serial: value} """
+        return {s: r.value for s, r in self.__results.items() if r.ok}
+
+    def errors(self):
+        """ 失败设备的异常 {serial: error}，超时为 TimeoutError """
+        return {s: r.error for s, r in self.__results.items() if not r.ok}
+
+    def timedOut(self):
+        """ 超时的设备序列号列表 """
+        return [s for s, r in self.__results.items() if r.timedOut]
+
+
+class DeviceFleet:
+    """
+    多设备并行执行
+    根据 deviceList() 为每台设备创建一个 AdbUtils，
+    用有限数量的线程把命令或函数分发到所有设备，收集结果和异常。
+    超时的设备直接记为失败，并释放并发名额，不会拖住整批任务；
+    超时设备的线程仍在后台等待 adb 返回，它的 AdbUtils 可能暂时不可用。
+    """
+
+    def __init__(self, adb_path="", max_workers=8, timeout=None, states=("device",), **kwargs):
+        """
+        adb_path: adb 程序路径
+        max_workers: 同时执行的设备数量上限
+        timeout: 默认的单设备超时秒数，None 表示不超时
+        states: 纳入的设备状态
+        kwargs: 传给 AdbUtils 的其他参数，如 transport
+        """
+        self.__adbPath = adb_path
+        self.__maxWorkers = max_workers
+        self.__timeout = timeout
+        self.__states = states
+        self.__kwargs = kwargs
+        self.__devices = {}
+        self.refresh()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __getitem__(self, serial):
+        return self.__devices[serial]
+
+    def __iter__(self):
+        return iter(self.__devices.values())
+
+    def __len__(self):
+        return len(self.__devices)
+
+    @property
+    def maxWorkers(self):
+        """ maxWorkers 属性 读 """
+        return self.__maxWorkers
+
+    @maxWorkers.setter
+    def maxWorkers(self, max_workers):
+        """ maxWorkers 属性 写 """
+        self.__maxWorkers = max_workers
+
+    def serials(self):
+        """ 设备序列号列表 """
+        return list(self.__devices)
+
+    def refresh(self):
+        """ 重新获取设备列表，新增设备创建 AdbUtils，移除已断开的设备 """
+        lister = AdbUtils(self.__adbPath, **self.__kwargs)
+        found = [s for s, state in lister.deviceList() if state in self.__states]
+        lister.close()
+        for serial in list(self.__devices):
+            if serial not in found:
+                self.__devices.pop(serial).close()
+        for serial in found:
+            if serial not in self.__devices:
+                self.__devices[serial] = AdbUtils(self.__adbPath, serial, **self.__kwargs)
+        return self.serials()
+
+    def map(self, func, *args, timeout=None, serials=None):
+        """
+        在每台设备上并行执行 func(adb, *args)，返回 FleetResult
+        timeout: 单设备超时秒数，默认使用构造时的 timeout
+        serials: 只在这些设备上执行，默认所有设备
+        例子: map(lambda adb: adb.sdkVersion())
+        """
+        if timeout is None:
+            timeout = self.__timeout
+        if serials is None:
+            serials = self.serials()
+        todo = list(serials)
+        running = {}
+        results = {}
+        cond = threading.Condition()
+
+        def worker(serial, adb, start):
+            value, error = None, None
+            try:
+                value = func(adb, *args)
+            except Exception as e:
+                error = e
+            with cond:
+                # 已超时的设备结果丢弃
+                if running.pop(serial, None) is not None:
+                    results[serial] = DeviceResult(serial, value, error, time.monotonic() - start)
+                    cond.notify_all()
+
+        with cond:
+            while todo or running:
+                while todo and len(running) < self.__maxWorkers:
+                    serial = todo.pop(0)
+                    start = time.monotonic()
+                    running[serial] = start
+                    threading.Thread(target=worker, args=(serial, self.__devices[serial], start),
+                                     daemon=True).start()
+                wait_for = None
+                if timeout is not None:
+                    now = time.monotonic()
+                    for serial, start in list(running.items()):
+                        if now - start >= timeout:
+                            del running[serial]
+                            results[serial] = DeviceResult(serial, None, TimeoutError("设备 %s 执行超时" % serial),
+                                                           now - start, True)
+                    if running:
+                        wait_for = max(0.0, min(running.values()) + timeout - now)
+                if running and (not todo or len(running) >= self.__maxWorkers):
+                    cond.wait(wait_for)
+        return FleetResult({s: results[s] for s in serials})
+
+    def shell(self, args, timeout=None, serials=None):
+        """
+        在每台设备上并行执行 adb shell 命令
+        例子: shell("getprop ro.product.model")
+        """
+        return self.map(lambda adb: adb.shell(args), timeout=timeout, serials=serials)
+
+    def close(self):
+        """ 关闭所有设备的会话和连接 """
+        for adb in self.__devices.values():
+            adb.close()
@@ -0,0 +1,72 @@
+# -*    coding: utf-8 -*-
+
+import time
+
+# 输入事件后的等待方式
+PACING_NONE = "none"        # shell 命令执行完成后立即返回
+PACING_FIXED = "fixed"      # 固定等待 delay 秒
+PACING_SETTLE = "settle"    # 等待屏幕画面稳定
+
+
+class InputPacing:
+    """
+    输入事件（按键、点击、滑动、文本）之后的等待策略
+    所有传输方式下 shell() 都会等命令在设备上执行完成才返回，
+    因此 PACING_NONE 即“命令完成即返回”；
+    PACING_SETTLE 在此基础上连续截取缩小的灰度图，
+    相邻帧平均差值低于阈值的次数达到 settle_frames 时认为画面已稳定。
+    """
+
+    def __init__(self, mode=PACING_FIXED, delay=0.5, settle_timeout=3.0, settle_interval=0.05,
+                 settle_threshold=2.0, settle_frames=2, settle_scale=0.125):
+        """
+        mode: PACING_NONE | PACING_FIXED | PACING_SETTLE
+        delay: PACING_FIXED 的等待秒数
+        settle_timeout: 等待画面稳定的最长秒数
+        settle_interval: 两次截屏之间的间隔秒数
+        settle_threshold: 相邻帧灰度平均差值（0~255）低于此值视为没有变化
+        settle_frames: 连续多少次没有变化视为稳定
+        settle_scale: 比较前的缩小比例
+        """
+        self.mode = mode
+        self.delay = delay
+        self.settleTimeout = settle_timeout
+        self.settleInterval = settle_interval
+        self.settleThreshold = settle_threshold
+        self.settleFrames = settle_frames
+        self.settleScale = settle_scale
+
+    @staticmethod
+    def none():
+        """ 不额外等待 """
+        return InputPacing(PACING_NONE)
+
+    @staticmethod
+    def fixed(delay=0.5):
+        """ 固定等待 delay 秒 """
+        return InputPacing(PACING_FIXED, delay)
+
+    @staticmethod
+    def settle(timeout=3.0, threshold=2.0, frames=2):
+        """ 等待屏幕画面稳定 """
+        return InputPacing(PACING_SETTLE, settle_timeout=timeout, settle_threshold=threshold,
+                           settle_frames=frames)
+
+    def wait(self, adb):
+        """
+        输入事件之后调用，按策略等待
+        PACING_SETTLE 返回画面是否在超时前稳定，其他方式返回 True
+        """
+        if self.mode == PACING_FIXED:
+            time.sleep(self.delay)
+        elif self.mode == PACING_SETTLE:
+            return self.waitSettle(adb)
+        return True
+
+    def waitSettle(self, adb):
+        """ 等待屏幕画面稳定，超时返回 False """
+        from bmmpy import bmmimage
+
+        frames = adb.screenFrames("gray", self.settleInterval)
+        return bmmimage.wait_frames_stable(frames, self.settleFrames, self.settleTimeout,
+                                           self.settleThreshold, self.settleScale) is not None
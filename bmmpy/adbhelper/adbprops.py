@@ -0,0 +1,61 @@
+# -*    coding: utf-8 -*-
+
+import re
+
+_PROP_RE = re.compile(r"^\[([^\]]*)\]: \[(.*)\]\s*$", re.M)
+_WM_SIZE_RE = re.compile(r"^(Physical|Override) size: (\d+)x(\d+)", re.M)
+
+
+def parseGetprop(txt):
+    """
+    解析 getprop 输出为字典
+    例子: parseGetprop("[ro.build.version.sdk]: [30]") -> {"ro.build.version.sdk": "30"}
+    """
+    return dict(_PROP_RE.findall(txt))
+
+
+def parseWmSize(txt):
+    """
+    解析 wm size 输出，返回 (width, high)，有 Override 时优先，没有时返回 None
+    """
+    sizes = {kind: (int(w), int(h)) for kind, w, h in _WM_SIZE_RE.findall(txt)}
+    return sizes.get("Override", sizes.get("Physical"))
+
+
+class DeviceProps:
+    """
+    设备属性快照
+    由一次 getprop 和 wm size 的输出解析得到，常用属性转换为对应类型，
+    其余属性用 get() 读取。
+    """
+
+    def __init__(self, props, screen_size=None):
+        self.__props = props
+        self.androidVersion = props.get("ro.build.version.release", "")
+        self.sdkVersion = int(props.get("ro.build.version.sdk", "0") or 0)
+        self.model = props.get("ro.product.model", "")
+        self.brand = props.get("ro.product.brand", "")
+        self.manufacturer = props.get("ro.product.manufacturer", "")
+        self.device = props.get("ro.product.device", "")
+        self.abi = props.get("ro.product.cpu.abi", "")
+        self.serialNo = props.get("ro.serialno", "")
+        self.screenSize = screen_size
+
+    @staticmethod
+    def parse(txt):
+        """ 从 getprop 和 wm size 的合并输出创建快照 """
+        return DeviceProps(parseGetprop(txt), parseWmSize(txt))
+
+    def get(self, key, default=""):
+        """
+        读取任意属性
+        例子: get("ro.build.fingerprint")
+        """
+        return self.__props.get(key, default)
+
+    def __contains__(self, key):
+        return key in self.__props
+
+    def __repr__(self):
+        return "DeviceProps(model=%r, androidVersion=%r, sdkVersion=%r, screenSize=%r)" % (
+            self.model, self.androidVersion, self.sdkVersion, self.screenSize)
@@ -0,0 +1,82 @@
+# -*    coding: utf-8 -*-
+
+import struct
+import numpy as np
+import cv2
+
+# screencap 原始输出的像素格式
+PIXEL_FORMAT_RGBA_8888 = 1
+PIXEL_FORMAT_RGBX_8888 = 2
+PIXEL_FORMAT_BGRA_8888 = 5
+
+# 输出颜色
+COLOR_RAW = "raw"       # 设备原始 4 通道数据，不做转换
+COLOR_BGR = "bgr"       # OpenCV 默认的 BGR 3 通道
+COLOR_GRAY = "gray"     # 灰度单通道
+
+_HEADER_SIZE = 12
+
+
+def _readFull(readinto, view):
+    pos = 0
+    size = len(view)
+    while pos < size:
+        n = readinto(view[pos:])
+        if not n:
+            break
+        pos += n
+    return pos
+
+
+class ScreencapReader:
+    """
+    从 screencap 原始输出流读取截图到 numpy 数组
+    不经过 PNG 编解码，也不写文件；缓冲区在分辨率不变时重复使用，
+    返回的数组会被下一次 read() 覆盖，需要保留时请 copy()。
+    """
+
+    def __init__(self):
+        self.__header = bytearray(_HEADER_SIZE)
+        self.__raw = None
+        self.__out = {}
+
+    def read(self, readinto, color=COLOR_BGR):
+        """
+        读取一帧截图
+        readinto: 流的 readinto 方法，如 pipe.stdout.readinto 或 socket.recv_into
+        color: COLOR_RAW | COLOR_BGR | COLOR_GRAY
+        """
+        if _readFull(readinto, memoryview(self.__header)) != _HEADER_SIZE:
+            raise ValueError("screencap 数据不完整")
+        w, h, fmt = struct.unpack("<III", self.__header)
+        if fmt not in (PIXEL_FORMAT_RGBA_8888, PIXEL_FORMAT_RGBX_8888, PIXEL_FORMAT_BGRA_8888):
+            raise ValueError("不支持的 screencap 像素格式: %d" % fmt)
+
+        # Android 9 以上头部多 4 字节 colorspace，按实际读到的长度判断
+        size = w * h * 4
+        if self.__raw is None or len(self.__raw) < size + 4:
+            self.__raw = np.empty(size + 4, dtype=np.uint8)
+        n = _readFull(readinto, memoryview(self.__raw)[:size + 4])
+        if n == size + 4:
+            offset = 4
+        elif n == size:
+            offset = 0
+        else:
+            raise ValueError("screencap 数据长度错误: %d" % n)
+        pixels = self.__raw[offset:offset + size].reshape(h, w, 4)
+
+        if color == COLOR_RAW:
+            return pixels
+        if color == COLOR_BGR:
+            code = cv2.COLOR_BGRA2BGR if fmt == PIXEL_FORMAT_BGRA_8888 else cv2.COLOR_RGBA2BGR
+            shape = (h, w, 3)
+        elif color == COLOR_GRAY:
+            code = cv2.COLOR_BGRA2GRAY if fmt == PIXEL_FORMAT_BGRA_8888 else cv2.COLOR_RGBA2GRAY
+            shape = (h, w)
+        else:
+            raise ValueError("不支持的颜色: %s" % color)
+        out = self.__out.get(color)
+        if out is None or out.shape != shape:
+            out = np.empty(shape, dtype=np.uint8)
+            self.__out[color] = out
+        return cv2.cvtColor(pixels, code, dst=out)
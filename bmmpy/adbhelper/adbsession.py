@@ -0,0 +1,133 @@
+# -*    coding: utf-8 -*-
+
+import subprocess
+import threading
+import queue
+import uuid
+
+
+class AdbShellSession:
+    """
+    常驻 adb shell 会话
+    只启动一个 adb shell 进程，命令从标准输入写入，
+    每条命令在子 shell 中执行，之后输出一行哨兵用于截取结果和退出码，
+    进程退出后下一条命令自动重连。
+    """
+
+    def __init__(self, adb_path="adb", adb_device_id="", encoding="utf8", timeout=None):
+        self.__adbPath = adb_path if adb_path != "" else "adb"
+        self.__deviceID = adb_device_id
+        self.__encoding = encoding
+        self.__timeout = timeout
+        self.__proc = None
+        self.__lines = None
+        self.__lock = threading.Lock()
+        self.__sentinel = "__BMM_%s__" % uuid.uuid4().hex
+        self.__sentinelBytes = self.__sentinel.encode("ascii")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def timeout(self):
+        """ timeout 属性 读，单条命令的超时秒数，None 表示不超时 """
+        return self.__timeout
+
+    @timeout.setter
+    def timeout(self, timeout):
+        """ timeout 属性 写 """
+        self.__timeout = timeout
+
+    def isAlive(self):
+        """ 会话进程是否存活 """
+        return self.__proc is not None and self.__proc.poll() is None
+
+    def __start(self):
+        args = [self.__adbPath]
+        if self.__deviceID != "":
+            args += ["-s", self.__deviceID]
+        args.append("shell")
+        self.__proc = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                       stderr=subprocess.DEVNULL)
+        self.__lines = queue.Queue()
+        reader = threading.Thread(target=self.__readLines, args=(self.__proc.stdout, self.__lines),
+                                  daemon=True)
+        reader.start()
+
+    @staticmethod
+    def __readLines(stream, lines):
+        for line in iter(stream.readline, b""):
+            lines.put(line)
+        lines.put(None)
+
+    def __write(self, cmd):
+        # 命令放在子 shell ( ) 中，cd、set -e、exit 等不影响会话；
+        # 标准输入重定向避免吃掉后续命令，stderr 丢弃与其他传输方式一致，printf 先换行保证哨兵独占一行
+        script = "( %s\n) </dev/null 2>/dev/null\nprintf '\\n%s %%d\\n' $?\n" % (cmd, self.__sentinel)
+        self.__proc.stdin.write(script.encode(self.__encoding))
+        self.__proc.stdin.flush()
+
+    def __read(self, timeout):
+        out = []
+        while True:
+            try:
+                line = self.__lines.get(timeout=timeout)
+            except queue.Empty:
+                # 哨兵未到，会话已不同步，只能丢弃
+                self.close()
+                raise TimeoutError("adb shell 命令超时")
+            if line is None:
+                self.close()
+                raise ConnectionError("adb shell 会话已断开")
+            if line.startswith(self.__sentinelBytes):
+                code = int(line[len(self.__sentinelBytes):].strip() or -1)
+                break
+            out.append(line)
+        data = b"".join(out)
+        if data.endswith(b"\r\n"):
+            data = data[:-2]
+        elif data.endswith(b"\n"):
+            data = data[:-1]
+        return str(data, encoding=self.__encoding, errors="replace"), code
+
+    def run(self, cmd, timeout=None):
+        """
+        执行一条 shell 命令，返回 (输出, 退出码)
+        命令在子 shell 中执行，不保留 cd 等状态；stderr 丢弃
+        例子: run("getprop ro.product.model")
+        """
+        if timeout is None:
+            timeout = self.__timeout
+        with self.__lock:
+            if not self.isAlive():
+                self.__start()
+            try:
+                self.__write(str(cmd))
+            except OSError:
+                # 写入时管道已断开，命令还没执行，重连后重发一次
+                self.close()
+                self.__start()
+                self.__write(str(cmd))
+            return self.__read(timeout)
+
+    def close(self):
+        """ 关闭会话 """
+        proc = self.__proc
+        self.__proc = None
+        if proc is None:
+            return
+        try:
+            if proc.poll() is None:
+                proc.stdin.write(b"exit\n")
+                proc.stdin.flush()
+            proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            proc.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
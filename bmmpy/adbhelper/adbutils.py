@@ -2,14 +2,84 @@
 
 import subprocess
 import platform
+import socket
 import time
+import uuid
+from .adbsession import AdbShellSession
+from .adbclient import AdbClient
+from .adbpacing import InputPacing
+from .adbprops import DeviceProps
+from . import adbdumpsys
+
+# shell 命令的传输方式
+TRANSPORT_POPEN = "popen"       # 每条命令启动一个 adb 进程
+TRANSPORT_SESSION = "session"   # 常驻一个 adb shell 会话
+TRANSPORT_SOCKET = "socket"     # 直接连接 adb server，不启动 adb 进程
+
+# socket 传输时过长的脚本先推送到此目录再执行
+SCRIPT_DIR = "/data/local/tmp"
+
+
+class _ProcessStream:
+    """ 子进程输出流，关闭时结束子进程 """
+
+    def __init__(self, proc):
+        self.__proc = proc
+
+    def readline(self):
+        return self.__proc.stdout.readline()
+
+    def read(self, size=-1):
+        return self.__proc.stdout.read(size)
+
+    def close(self):
+        if self.__proc.poll() is None:
+            self.__proc.kill()
+        self.__proc.stdout.close()
+        self.__proc.wait()
+
+
+class _SocketStream:
+    """ adb server 连接的输出流，关闭时断开连接 """
+
+    def __init__(self, sock):
+        self.__sock = sock
+        self.__file = sock.makefile("rb")
+
+    def readline(self):
+        return self.__file.readline()
+
+    def read(self, size=-1):
+        return self.__file.read(size)
+
+    def close(self):
+        # shutdown 让其他线程中阻塞的读取立即返回
+        try:
+            self.__sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.__file.close()
+        self.__sock.close()
 
 
 class AdbUtils:
 
-    def __init__(self, adb_path="", adb_device_id="", encoding="", line_char=""):
+    def __init__(self, adb_path="", adb_device_id="", encoding="", line_char="",
+                 transport=TRANSPORT_POPEN, server_host="127.0.0.1", server_port=5037,
+                 pacing=None, battery_ttl=1.0):
         system = platform.system()
         self.__adbPath = adb_path
+        self.__serial = adb_device_id
+        self.__transport = transport
+        self.__session = None
+        self.__screen = None
+        self.__client = None
+        self.__pacing = pacing if pacing is not None else InputPacing()
+        self.__props = None
+        self.__batteryTTL = battery_ttl
+        self.__battery = None
+        if transport == TRANSPORT_SOCKET:
+            self.__client = AdbClient(server_host, server_port)
         
         if (adb_device_id == ""):
             self.__adb_deviceID = ""
@@ -43,6 +113,7 @@ class AdbUtils:
     def adbPath(self, adb_path):
         """ adbPath 属性 写"""
         self.__adbPath = adb_path
+        self.closeSession()
 
     @property
     def adbDeviceID(self):
@@ -53,6 +124,47 @@ class AdbUtils:
     def adbDeviceID(self, device_id):
         """ adbDeviceID 属性 写"""
         self.__adb_deviceID = device_id
+        self.__serial = device_id[3:] if device_id.startswith("-s ") else device_id
+        self.closeSession()
+        self.invalidateProps()
+
+    @property
+    def transport(self):
+        """ transport 属性 读，shell 命令的传输方式 """
+        return self.__transport
+
+    @property
+    def pacing(self):
+        """ pacing 属性 读，输入事件之后的等待策略 InputPacing """
+        return self.__pacing
+
+    @pacing.setter
+    def pacing(self, pacing):
+        """ pacing 属性 写 """
+        self.__pacing = pacing
+
+    @property
+    def client(self):
+        """ client 属性 读，socket 传输方式下的 AdbClient，其他方式为 None """
+        return self.__client
+
+    def shellSession(self):
+        """ 获取常驻 adb shell 会话，不存在时创建 """
+        if self.__session is None:
+            self.__session = AdbShellSession(self.__adbPath, self.__serial, self.__encoding)
+        return self.__session
+
+    def closeSession(self):
+        """ 关闭常驻 adb shell 会话 """
+        if self.__session is not None:
+            self.__session.close()
+            self.__session = None
+
+    def close(self):
+        """ 关闭常驻会话和 socket 连接池 """
+        self.closeSession()
+        if self.__client is not None:
+            self.__client.close()
 
     def __findAll(self, line_txt, find_txt):
         line_txt = line_txt.split(self.__linechar)
@@ -62,6 +174,19 @@ class AdbUtils:
                 find_ok.append(i)
         return find_ok
 
+    def __lineFormat(self, txt):
+        # 设备端输出统一换成 line_char 换行，保证按行解析的方法可用
+        txt = txt.replace("\r\n", "\n")
+        if self.__linechar != "\n":
+            txt = txt.replace("\n", self.__linechar)
+        return txt
+
+    def __adbArgs(self, *args):
+        result = [self.__adbPath if self.__adbPath != "" else "adb"]
+        if self.__serial != "":
+            result += ["-s", self.__serial]
+        return result + list(args)
+
     def adbCmd(self, args):
         """ adb 命令 """
         cmd = "%s %s" % (self.__adbPath, str(args))
@@ -75,8 +200,48 @@ class AdbUtils:
 
     def shell(self, args):
         """ adb shell 带 deviceID 命令 """
+        if self.__transport == TRANSPORT_SESSION:
+            return self.__lineFormat(self.shellSession().run(args)[0])
+        if self.__transport == TRANSPORT_SOCKET:
+            result = str(self.__client.shell(self.__serial, str(args)), encoding=self.__encoding)
+            return self.__lineFormat(result)
         return self.adbCmd("%s shell %s" % (self.__adb_deviceID, str(args)))
 
+    def shellStream(self, args):
+        """
+        启动一个持续输出的 shell 命令，返回二进制流，可 readline() / read()
+        用完后调用 close() 结束命令
+        例子: shellStream("logcat -v brief")
+        """
+        if self.__transport == TRANSPORT_SOCKET:
+            return _SocketStream(self.__client.openService(self.__serial, "shell:%s" % args))
+        proc = subprocess.Popen(self.__adbArgs("shell", str(args)), stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL)
+        return _ProcessStream(proc)
+
+    def shellScript(self, script):
+        """
+        在设备上执行一段多行 shell 脚本，只需要一次往返
+        脚本原样交给设备端 sh，不经过电脑端 shell 解释
+        """
+        if self.__transport == TRANSPORT_SESSION:
+            return self.__lineFormat(self.shellSession().run(script)[0])
+        if self.__transport == TRANSPORT_SOCKET:
+            if len(("shell:" + script).encode("utf8")) > AdbClient.REQUEST_MAX:
+                result = self.__socketScriptFile(script)
+            else:
+                result = self.__client.shell(self.__serial, script)
+            return self.__lineFormat(str(result, encoding=self.__encoding))
+        pipe = subprocess.run(self.__adbArgs("shell"), input=(script + "\nexit\n").encode(self.__encoding),
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        return self.__lineFormat(str(pipe.stdout, encoding=self.__encoding))
+
+    def __socketScriptFile(self, script):
+        # shell: 请求最长 0xFFFF 字节，过长的脚本先用 sync 推送到设备再执行
+        remote = "%s/.bmm_%s.sh" % (SCRIPT_DIR, uuid.uuid4().hex)
+        self.__client.pushData(self.__serial, script.encode(self.__encoding), remote)
+        return self.__client.shell(self.__serial, "sh %s; rm -f %s" % (remote, remote))
+
     def startServer(self):
         """ 启动 adb 服务 """
         return self.adbCmd("start-server")
@@ -95,6 +260,8 @@ class AdbUtils:
 
     def deviceList(self):
         """ 获取设备列表 """
+        if self.__transport == TRANSPORT_SOCKET:
+            return self.__client.devices()
         devs = self.__findAll(self.adbCmd("devices"), "\t")
         result = []
         for i in devs:
@@ -120,17 +287,31 @@ class AdbUtils:
         """ 断开无线连接的设备 """
         return self.adbCmd("disconnect %s" % ip)
 
+    def deviceProps(self, refresh=False):
+        """
+        获取设备属性快照 DeviceProps
+        第一次调用时执行一次 getprop 和 wm size，之后使用缓存，refresh=True 时重新获取
+        """
+        if self.__props is None or refresh:
+            self.__props = DeviceProps.parse(self.shellScript("getprop\nwm size"))
+        return self.__props
+
+    def invalidateProps(self):
+        """ 清除设备属性和电池信息缓存 """
+        self.__props = None
+        self.__battery = None
+
     def androidVersion(self):
         """ 获取设备中的Android版本号，如4.2.2 """
-        return self.shell("getprop ro.build.version.release")
+        return self.deviceProps().androidVersion
 
     def sdkVersion(self):
         """ 获取设备SDK版本号 """
-        return self.shell("getprop ro.build.version.sdk")
+        return str(self.deviceProps().sdkVersion)
 
     def deviceModel(self):
         """ 获取设备型号 """
-        return self.shell("getprop ro.product.model")
+        return self.deviceProps().model
 
     def reboot(self):
         """ 重启设备 """
@@ -207,19 +388,23 @@ class AdbUtils:
         return self.shell("am start -n %s" % component)
 
     def __currentPackageAndActivity(self, pack_tcti):
-        dump = self.shell("dumpsys window w")
-        str_line = dump.split(self.__linechar)
-        pa = []
-        for i in str_line:
-            if (i.find("mCurrentFocus=Window") >= 0):
-                pa = i.split(" ")
-        if (len(pa) > 4):
-            pa = pa[4].split("}")[0]
-        result_list = pa.split("/")
-        result = ""
-        if (len(result_list) > pack_tcti):
-            result = result_list[pack_tcti]
-        return result
+        return self.currentFocus()[pack_tcti]
+
+    def currentFocus(self):
+        """ 获取当前焦点窗口，返回 (package, activity) """
+        # 设备没有 grep 时输出为空，改为读取完整的 dumpsys window
+        dump = self.shellScript(adbdumpsys.CMD_FOCUS)
+        if dump.strip() == "":
+            dump = self.shell("dumpsys window windows")
+        return adbdumpsys.parseFocus(dump)
+
+    def activityWatcher(self):
+        """
+        创建前台 Activity 监视器 ActivityWatcher，用事件代替轮询
+        例子: with adb.activityWatcher() as w: w.waitForActivity("com.android.settings")
+        """
+        from .adbwatcher import ActivityWatcher
+        return ActivityWatcher(self)
 
     def currentPackage(self):
         """ 获取当前运行应用的 package """
@@ -247,14 +432,15 @@ class AdbUtils:
         """
         获取设备屏幕分辨率，返回：width, high
         """
-        a = self.__findAll(self.shell("dumpsys display"), "mStableDisplaySize")
-        s = a[0]
-        result = []
-        size = s.split(",")
-        result.append(size[0].split("(")[-1])
-        result.append(size[1].split(")")[0])
-        result[1] = result[1].split(" ")[-1]
-        return result
+        size = self.deviceProps().screenSize
+        if size is not None:
+            return [str(size[0]), str(size[1])]
+        # 与 currentFocus 相同，设备没有 grep 时输出为空，改为读取完整的 dumpsys display
+        dump = self.shellScript(adbdumpsys.CMD_DISPLAY)
+        if dump.strip() == "":
+            dump = self.shell("dumpsys display")
+        size = adbdumpsys.parseDisplay(dump)["mStableDisplaySize"]
+        return [str(size[0]), str(size[1])]
 
     def batteryInfo(self, args):
         """
@@ -272,12 +458,19 @@ class AdbUtils:
         5：充电已满
         
         例子: batteryInfo("level")
+        电池信息在 battery_ttl 秒内使用缓存
+        """
+        return self.batteryState().get(args, 0)
+
+    def batteryState(self):
+        """
+        获取 dumpsys battery 的全部字段，返回字典，值为字符串
+        在 battery_ttl 秒内使用缓存
         """
-        a = self.__findAll(self.shell("dumpsys battery"), args)
-        val = 0
-        if len(a) > 0:
-            val = a[0].split(": ")[-1]
-        return val
+        now = time.monotonic()
+        if self.__battery is None or now - self.__battery[0] >= self.__batteryTTL:
+            self.__battery = (now, adbdumpsys.parseBattery(self.shell(adbdumpsys.CMD_BATTERY)))
+        return self.__battery[1]
 
     def pressKey(self, keycode):
         """
@@ -286,7 +479,7 @@ class AdbUtils:
         例子: pressKey(keycode.HOME)
         """
         self.shell("input keyevent %s" % str(keycode))
-        time.sleep(0.5)
+        self.__pacing.wait(self)
 
     def longPressKey(self, keycode):
         """
@@ -295,14 +488,14 @@ class AdbUtils:
         例子: longPressKey(keycode.HOME)
         """
         self.shell("input keyevent --longpress %s" % str(keycode))
-        time.sleep(0.5)
+        self.__pacing.wait(self)
 
     def touch(self, x, y):
         """
         点击屏幕的某个坐标位置
         """
         self.shell("input tap %s %s" % (str(x), str(y)))
-        time.sleep(0.5)
+        self.__pacing.wait(self)
 
     def swipe(self, start_x, start_y, end_x, end_y, duration=""):
         """
@@ -310,7 +503,7 @@ class AdbUtils:
         例子:  swipe(800, 500, 200, 500)
         """
         self.shell("input swipe %s %s %s %s %s" % (str(start_x), str(start_y), str(end_x), str(end_y), str(duration)))
-        time.sleep(0.5)
+        self.__pacing.wait(self)
 
     def longTouch(self, x, y, duration=1000):
         """
@@ -324,7 +517,7 @@ class AdbUtils:
         例子: sendText("i am unique")
         """
         self.shell("input text %s" % txt)
-        time.sleep(0.5)
+        self.__pacing.wait(self)
 
     def screencapToPhone(self, file_name):
         """截屏到手机"""
@@ -332,5 +525,45 @@ class AdbUtils:
 
     def screencapToPc(self, file_name):
         """截屏到电脑"""
-        self.shell("screencap -p > %s" % file_name)
+        if self.__transport == TRANSPORT_SOCKET:
+            with open(file_name, "wb") as f:
+                f.write(self.__client.execOut(self.__serial, "screencap -p"))
+            return
+        with open(file_name, "wb") as f:
+            subprocess.run(self.__adbArgs("exec-out", "screencap", "-p"), stdout=f,
+                           stderr=subprocess.DEVNULL)
+
+    def screencapArray(self, color="bgr"):
+        """
+        截屏到 numpy 数组，直接读取 screencap 原始像素，不经过 PNG 和文件
+        color: "bgr" | "gray" | "raw"，bgr 和 gray 可直接用于 bmmimage.image_match
+        返回的数组在下一次截屏时会被覆盖，需要保留时请 copy()
+        """
+        from .adbscreen import ScreencapReader
+        if self.__screen is None:
+            self.__screen = ScreencapReader()
+        if self.__transport == TRANSPORT_SOCKET:
+            sock = self.__client.openService(self.__serial, "exec:screencap")
+            try:
+                return self.__screen.read(sock.recv_into, color)
+            finally:
+                sock.close()
+        pipe = subprocess.Popen(self.__adbArgs("exec-out", "screencap"), stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, bufsize=0)
+        try:
+            return self.__screen.read(pipe.stdout.readinto, color)
+        finally:
+            pipe.stdout.close()
+            pipe.wait()
+
+    def screenFrames(self, color="gray", interval=0):
+        """
+        连续截屏的生成器，每两帧之间等待 interval 秒
+        可直接用于 bmmimage.changed_frames / wait_frames_stable
+        每帧数组在下一帧时会被覆盖，需要保留时请 copy()
+        """
+        while True:
+            yield self.screencapArray(color)
+            if interval > 0:
+                time.sleep(interval)
         
@@ -0,0 +1,221 @@
+# -*    coding: utf-8 -*-
+
+import re
+import time
+import queue
+import asyncio
+import threading
+
+# 关注的 events 日志标签，不同 Android 版本名称不同
+ACTIVITY_TAGS = (
+    "am_set_resumed_activity",  # Android 9
+    "wm_set_resumed_activity",  # Android 10 以上
+    "am_focused_activity",      # Android 5 ~ 8
+)
+
+_LINE_RE = re.compile(r"^[VDIWEF]/(\w+)\s*(?:\(\s*\d+\))?:\s*\[(.*)\]\s*$")
+_COMPONENT_RE = re.compile(r"^([\w.]+)/([\w.$]+)$")
+
+
+class ActivityEvent:
+    """ 前台 Activity 变化事件 """
+
+    __slots__ = ("tag", "package", "activity", "time")
+
+    def __init__(self, tag, package, activity, event_time):
+        self.tag = tag
+        self.package = package
+        self.activity = activity
+        self.time = event_time
+
+    def __repr__(self):
+        return "ActivityEvent(%r, %r, %r)" % (self.tag, self.package, self.activity)
+
+    def matches(self, package, activity=None):
+        """
+        是否为指定的 package 和 activity，activity 为 None 时只比较 package
+        activity 可以写成 ".Settings" 或完整类名
+        """
+        if self.package != package:
+            return False
+        if activity is None:
+            return True
+        return self.__fullName(self.activity) == self.__fullName(activity)
+
+    def __fullName(self, activity):
+        return self.package + activity if activity.startswith(".") else activity
+
+
+def parseActivityLine(line):
+    """ 解析一行 logcat -b events -v tag 输出，不是 Activity 事件时返回 None """
+    m = _LINE_RE.match(line.strip())
+    if m is None or m.group(1) not in ACTIVITY_TAGS:
+        return None
+    for item in m.group(2).split(","):
+        c = _COMPONENT_RE.match(item.strip())
+        if c is not None:
+            return ActivityEvent(m.group(1), c.group(1), c.group(2), time.monotonic())
+    return None
+
+
+class ActivityWatcher:
+    """
+    前台 Activity 监视器
+    常驻一个 logcat -b events 流，Activity 切换时立即得到事件，
+    代替循环调用 currentPackage() / currentActivity()。
+    事件可以通过回调、events() 生成器或 aevents() 异步迭代器获取。
+    启动时 logcat 会先输出一条最近的历史事件，作为当前状态。
+    例子:
+        with ActivityWatcher(adb) as w:
+            w.waitForActivity("com.android.settings", timeout=10)
+    """
+
+    def __init__(self, adb, tags=ACTIVITY_TAGS):
+        self.__adb = adb
+        self.__tags = tags
+        self.__stream = None
+        self.__thread = None
+        self.__lock = threading.Lock()
+        self.__callbacks = []
+        self.__queues = []
+        self.__last = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def last(self):
+        """ 最近一次事件，没有时为 None """
+        return self.__last
+
+    def isRunning(self):
+        """ 是否正在监视 """
+        return self.__thread is not None and self.__thread.is_alive()
+
+    def start(self):
+        """ 开始监视 """
+        if self.isRunning():
+            return
+        cmd = "logcat -b events -v tag -T 1 -s %s" % " ".join(self.__tags)
+        self.__stream = self.__adb.shellStream(cmd)
+        self.__thread = threading.Thread(target=self.__run, args=(self.__stream,), daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """ 停止监视，events() 和 aevents() 随之结束 """
+        stream = self.__stream
+        self.__stream = None
+        if stream is not None:
+            stream.close()
+        thread = self.__thread
+        self.__thread = None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=1)
+
+    def __run(self, stream):
+        try:
+            for line in iter(stream.readline, b""):
+                event = parseActivityLine(str(line, encoding="utf8", errors="replace"))
+                if event is not None:
+                    self.__dispatch(event)
+        except (OSError, ValueError):
+            pass
+        self.__dispatch(None)
+
+    def __dispatch(self, event):
+        if event is not None:
+            self.__last = event
+        with self.__lock:
+            callbacks = list(self.__callbacks)
+            queues = list(self.__queues)
+        for q in queues:
+            q(event)
+        if event is not None:
+            for callback in callbacks:
+                callback(event)
+
+    def addCallback(self, callback):
+        """ 添加回调 callback(event)，在监视线程中调用 """
+        with self.__lock:
+            self.__callbacks.append(callback)
+
+    def removeCallback(self, callback):
+        """ 移除回调 """
+        with self.__lock:
+            self.__callbacks.remove(callback)
+
+    def __subscribe(self, put):
+        with self.__lock:
+            self.__queues.append(put)
+
+    def __unsubscribe(self, put):
+        with self.__lock:
+            self.__queues.remove(put)
+
+    def events(self, timeout=None):
+        """
+        事件生成器
+        timeout 秒内没有新事件或监视停止时结束，timeout 为 None 时一直等待
+        """
+        q = queue.Queue()
+        self.__subscribe(q.put)
+        try:
+            while True:
+                try:
+                    event = q.get(timeout=timeout)
+                except queue.Empty:
+                    return
+                if event is None:
+                    return
+                yield event
+        finally:
+            self.__unsubscribe(q.put)
+
+    async def aevents(self):
+        """ 异步事件迭代器，监视停止时结束 """
+        loop = asyncio.get_running_loop()
+        q = asyncio.Queue()
+
+        def put(event):
+            loop.call_soon_threadsafe(q.put_nowait, event)
+
+        self.__subscribe(put)
+        try:
+            while True:
+                event = await q.get()
+                if event is None:
+                    return
+                yield event
+        finally:
+            self.__unsubscribe(put)
+
+    def waitForActivity(self, package, activity=None, timeout=None):
+        """
+        等待指定的 Activity 到前台，返回对应事件，超时返回 None
+        当前已在前台时立即返回
+        """
+        q = queue.Queue()
+        self.__subscribe(q.put)
+        try:
+            last = self.__last
+            if last is not None and last.matches(package, activity):
+                return last
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while True:
+                remain = None if deadline is None else deadline - time.monotonic()
+                if remain is not None and remain <= 0:
+                    return None
+                try:
+                    event = q.get(timeout=remain)
+                except queue.Empty:
+                    return None
+                if event is None:
+                    return None
+                if event.matches(package, activity):
+                    return event
+        finally:
+            self.__unsubscribe(q.put)
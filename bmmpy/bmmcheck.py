@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+LICENSE  MulanPSL2
+@author  cnhemiya@qq.com
+@date    2026-10-17 16:00
+
+@brief 运行时类型检查开关。
+
+bmmpy 的模块使用本模块的 typechecked 装饰器，模块导入时按开关决定：
+开启时使用 typeguard 检查参数和返回值（开发调试），关闭时直接返回原函数，没有任何额外开销。
+开启时函数在第一次调用时才由 typeguard 处理，只导入模块不会加载 typeguard。
+开关只影响之后导入的模块，需要在导入其他 bmmpy 模块之前设置。
+
+环境变量:
+    BMMPY_TYPECHECK=0      关闭类型检查（也可以是 false、off、no）
+    BMMPY_TYPECHECK=1      开启类型检查（默认）
+
+代码设置:
+    >>> from bmmpy import bmmcheck
+    >>> bmmcheck.set_typecheck(False)
+    >>> from bmmpy import bmmstring
+"""
+
+
+import os
+import functools
+
+
+TYPECHECK_ENV = "BMMPY_TYPECHECK"
+
+_FALSE_VALUES = ("0", "false", "off", "no")
+
+_enabled = os.environ.get(TYPECHECK_ENV, "1").strip().lower() not in _FALSE_VALUES
+
+
+def set_typecheck(enabled: bool) -> None:
+    """
+    设置是否开启类型检查，只影响之后导入的模块。
+
+    Args:
+        enabled (bool): True 开启，False 关闭。
+    """
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def typecheck_enabled() -> bool:
+    """
+    是否开启类型检查。
+
+    Returns:
+        bool: 开启时为 True。
+    """
+    return _enabled
+
+
+def _lazy_checked(func):
+    # 第一次调用时才导入 typeguard 并处理函数
+    checked = None
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        nonlocal checked
+        if checked is None:
+            from typeguard import typechecked as _typechecked
+            checked = _typechecked(func)
+        return checked(*args, **kwargs)
+
+    return wrapper
+
+
+def _lazy_checked_class(cls):
+    # 与 typeguard 处理类的方式相同：方法、静态方法、类方法和属性
+    for name, attr in list(cls.__dict__.items()):
+        if isinstance(attr, (staticmethod, classmethod)):
+            setattr(cls, name, type(attr)(_lazy_checked(attr.__func__)))
+        elif isinstance(attr, property):
+            setattr(cls, name, property(*(None if f is None else _lazy_checked(f)
+                                          for f in (attr.fget, attr.fset, attr.fdel)), attr.__doc__))
+        elif callable(attr) and hasattr(attr, "__code__"):
+            setattr(cls, name, _lazy_checked(attr))
+    return cls
+
+
+def typechecked(target):
+    """
+    类型检查装饰器，用法与 typeguard.typechecked 相同，可以装饰函数和类。
+    开启类型检查时使用 typeguard.typechecked（第一次调用时处理），关闭时原样返回 target。
+
+    Examples:
+        >>> @typechecked
+        ... def md5_string(text: str = "") -> str:
+        ...     ...
+    """
+    if not _enabled:
+        return target
+    if isinstance(target, type):
+        return _lazy_checked_class(target)
+    return _lazy_checked(target)
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+LICENSE  MulanPSL2
+@author  cnhemiya@qq.com
+@date    2026-10-17 13:10
+
+@brief 批量提取图像边缘，多进程并行，依赖 OpenCV。
+
+命令行用法:
+    python -m bmmpy.bmmedges "screens/**/*.png" edges/ -j 8
+    python -m bmmpy.bmmedges screens/ edges/ --skip hash
+"""
+
+
+import os
+import sys
+import json
+import glob
+import time
+import argparse
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Optional, Union
+import numpy as np
+import cv2
+from bmmpy.bmmcheck import typechecked
+from bmmpy import bmmfile
+from bmmpy import bmmraw
+from bmmpy import bmmtemplate
+
+
+# 跳过已是最新的输出的方式
+SKIP_NONE = "none"      # 全部重新处理
+SKIP_MTIME = "mtime"    # 输出文件比源文件新时跳过
+SKIP_HASH = "hash"      # 源文件内容和参数都没变时跳过，记录在输出目录的清单文件中
+
+MANIFEST_NAME = ".bmmedges.json"
+
+# 源目录中处理的文件扩展名
+IMAGE_EXTENSIONS = bmmtemplate.IMAGE_EXTENSIONS + (bmmraw.RAW_EXTENSION,)
+
+# 工作进程内的参数和重复使用的缓冲区
+_params = None
+_buffers = {}
+
+
+def _buffer(name, shape):
+    buf = _buffers.get(name)
+    if buf is None or buf.shape != shape:
+        buf = np.empty(shape, dtype=np.uint8)
+        _buffers[name] = buf
+    return buf
+
+
+def _init_worker(params):
+    global _params
+    _params = params
+    cv2.setNumThreads(1)
+
+
+def _file_md5(path):
+    md5 = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            md5.update(block)
+    return md5.hexdigest()
+
+
+def _process(src_path, dst_path, want_hash):
+    # 解码 -> 灰度 -> 模糊 -> Canny -> 编码，中间结果写入重复使用的缓冲区
+    # 原始帧文件（见 bmmraw）按扩展名识别后直接映射，输出扩展名为 bmmraw.RAW_EXTENSION 时不编码
+    p = _params
+    if src_path.lower().endswith(bmmraw.RAW_EXTENSION) and bmmraw.is_raw_frame(src_path):
+        image = bmmraw.read_raw_frame(src_path)
+    else:
+        image = cv2.imread(src_path, cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError(f"无法读取图像文件: {src_path}")
+    if p["user_gray"] and image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=_buffer("gray", image.shape[:2]))
+    if p["user_blur"]:
+        image = cv2.GaussianBlur(image, (p["ksize"], p["ksize"]), p["sigma"],
+                                 dst=_buffer("blur", image.shape))
+    edges = cv2.Canny(image, p["canny_low"], p["canny_high"], edges=_buffer("edges", image.shape[:2]))
+
+    os.makedirs(os.path.dirname(dst_path) or ".", exist_ok=True)
+    tmp_path = dst_path + ".tmp"
+    if dst_path.lower().endswith(bmmraw.RAW_EXTENSION):
+        bmmraw.write_raw_frame(tmp_path, edges)
+    else:
+        ok, data = cv2.imencode(os.path.splitext(dst_path)[1], edges)
+        if not ok:
+            raise ValueError(f"无法编码图像文件: {dst_path}")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+    os.replace(tmp_path, dst_path)
+    return _file_md5(src_path) if want_hash else ""
+
+
+def _collect(src: Union[str, list[str]], src_root: Optional[str], out_dir: str) -> tuple[list[str], str]:
+    if isinstance(src, str):
+        if os.path.isdir(src):
+            # 输出目录在源目录中时，不把已输出的边缘图当作源文件
+            out_prefix = os.path.join(os.path.abspath(out_dir), "")
+            files = [f for f in bmmfile.walk_files(src, extensions=IMAGE_EXTENSIONS)
+                     if not os.path.abspath(f).startswith(out_prefix)]
+            root = src
+        else:
+            files = [f for f in glob.glob(src, recursive=True) if os.path.isfile(f)]
+            root = ""
+    else:
+        files = list(src)
+        root = ""
+    if src_root is not None:
+        root = src_root
+    elif root == "":
+        root = os.path.commonpath([os.path.dirname(os.path.abspath(f)) for f in files]) if files else "."
+    return files, root
+
+
+@typechecked
+def image_to_edges_files(src: Union[str, list[str]], out_dir: str, src_root: Optional[str] = None,
+                         ext: str = ".png", processes: Optional[int] = None,
+                         max_in_flight: Optional[int] = None, skip: str = SKIP_MTIME,
+                         user_gray: bool = True, user_blur: bool = True, ksize: int = 3,
+                         sigma: float = 1.0, canny_high: int = 50, canny_low: int = 150,
+                         progress: Optional[Callable[[int, int, float], None]] = None) -> dict:
+    """
+    批量将图像转换为边缘图，多进程并行处理。
+
+    Args:
+        src (str | list[str]): 源图像，可以是目录（递归，只处理 IMAGE_EXTENSIONS 中的扩展名，
+            跳过其中的 out_dir）、通配符（如 "screens/**/*.png"）或文件列表（如 bmmfile.get_file_list 的结果）。
+        out_dir (str): 输出目录，保持源文件的相对目录结构。
+        src_root (str, optional): 计算相对路径的根目录，默认为源目录或所有源文件的公共目录。
+        ext (str): 输出文件扩展名，默认为 ".png"；bmmraw.RAW_EXTENSION 输出原始帧文件，不编码。
+        processes (int, optional): 进程数，默认为 CPU 数量。
+        max_in_flight (int, optional): 同时提交的最大任务数，默认为进程数的 4 倍。
+        skip (str): 跳过方式，SKIP_NONE、SKIP_MTIME 或 SKIP_HASH，默认为 SKIP_MTIME。
+        user_gray (bool): 是否将图像转为灰度图，默认为 True。
+        user_blur (bool): 是否对图像进行高斯模糊，默认为 True。
+        ksize (int): 高斯核大小，必须是奇数，默认为 3。
+        sigma (float): 高斯核的标准差，默认为 1.0。
+        canny_high (int): Canny 边缘检测的高阈值，默认为 50。
+        canny_low (int): Canny 边缘检测的低阈值，默认为 150。
+        progress (Callable, optional): 进度回调 progress(完成数, 总数, 已用秒数)。
+
+    Returns:
+        dict: 统计信息 {"total", "processed", "skipped", "failed", "seconds", "per_second", "errors"}，
+            errors 为 {源文件: 错误信息}。
+
+    Raises:
+        ValueError: skip 不支持时抛出。
+
+    Examples:
+        >>> stats = image_to_edges_files("screens", "edges", processes=8)
+        >>> print(stats["processed"], stats["per_second"])
+    """
+    if skip not in (SKIP_NONE, SKIP_MTIME, SKIP_HASH):
+        raise ValueError(f"不支持的跳过方式: {skip}")
+    start = time.perf_counter()
+    files, root = _collect(src, src_root, out_dir)
+    params = {"user_gray": user_gray, "user_blur": user_blur, "ksize": ksize, "sigma": sigma,
+              "canny_high": canny_high, "canny_low": canny_low}
+
+    # 清单记录源文件 md5 和参数，参数变化时全部重新处理
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    manifest = {}
+    if skip == SKIP_HASH and os.path.isfile(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        if saved.get("params") == params:
+            manifest = saved.get("files", {})
+
+    todo = []
+    skipped = 0
+    for f in files:
+        rel = os.path.relpath(f, root)
+        dst = os.path.join(out_dir, os.path.splitext(rel)[0] + ext)
+        if skip == SKIP_MTIME and os.path.isfile(dst) and os.path.getmtime(dst) >= os.path.getmtime(f):
+            skipped += 1
+        elif skip == SKIP_HASH and os.path.isfile(dst) and manifest.get(rel) == _file_md5(f):
+            skipped += 1
+        else:
+            todo.append((f, dst, rel))
+
+    total = len(files)
+    done = skipped
+    errors = {}
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if max_in_flight is None:
+        max_in_flight = processes * 4
+    if progress is not None:
+        progress(done, total, time.perf_counter() - start)
+
+    if todo:
+        with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(params,)) as executor:
+            pending = {}
+            todo_iter = iter(todo)
+            while True:
+                for f, dst, rel in todo_iter:
+                    pending[executor.submit(_process, f, dst, skip == SKIP_HASH)] = (f, rel)
+                    if len(pending) >= max_in_flight:
+                        break
+                if not pending:
+                    break
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    f, rel = pending.pop(future)
+                    try:
+                        md5 = future.result()
+                        if skip == SKIP_HASH:
+                            manifest[rel] = md5
+                    except Exception as e:
+                        errors[f] = str(e)
+                    done += 1
+                if progress is not None:
+                    progress(done, total, time.perf_counter() - start)
+
+    if skip == SKIP_HASH:
+        os.makedirs(out_dir, exist_ok=True)
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump({"params": params, "files": manifest}, f)
+
+    seconds = time.perf_counter() - start
+    processed = len(todo) - len(errors)
+    return {"total": total, "processed": processed, "skipped": skipped, "failed": len(errors),
+            "seconds": seconds, "per_second": processed / seconds if seconds > 0 else 0.0,
+            "errors": errors}
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """ 命令行入口 """
+    parser = argparse.ArgumentParser(prog="python -m bmmpy.bmmedges", description="批量提取图像边缘")
+    parser.add_argument("src", help="源目录或通配符，如 \"screens/**/*.png\"")
+    parser.add_argument("out_dir", help="输出目录")
+    parser.add_argument("--ext", default=".png", help="输出文件扩展名，默认 .png")
+    parser.add_argument("-j", "--processes", type=int, default=None, help="进程数，默认 CPU 数量")
+    parser.add_argument("--skip", choices=[SKIP_NONE, SKIP_MTIME, SKIP_HASH], default=SKIP_MTIME,
+                        help="跳过已是最新的输出，默认 mtime")
+    parser.add_argument("--no-gray", action="store_true", help="不转为灰度图")
+    parser.add_argument("--no-blur", action="store_true", help="不做高斯模糊")
+    parser.add_argument("--ksize", type=int, default=3)
+    parser.add_argument("--sigma", type=float, default=1.0)
+    parser.add_argument("--canny-high", type=int, default=50)
+    parser.add_argument("--canny-low", type=int, default=150)
+    parser.add_argument("-q", "--quiet", action="store_true", help="不显示进度")
+    args = parser.parse_args(argv)
+
+    def show(done, total, seconds):
+        rate = done / seconds if seconds > 0 else 0.0
+        print(f"\r{done}/{total}  {rate:.1f} 张/秒", end="", file=sys.stderr, flush=True)
+
+    stats = image_to_edges_files(args.src, args.out_dir, ext=args.ext, processes=args.processes,
+                                 skip=args.skip, user_gray=not args.no_gray, user_blur=not args.no_blur,
+                                 ksize=args.ksize, sigma=args.sigma, canny_high=args.canny_high,
+                                 canny_low=args.canny_low, progress=None if args.quiet else show)
+    if not args.quiet:
+        print(file=sys.stderr)
+    for f, msg in stats["errors"].items():
+        print(f"失败: {f}: {msg}", file=sys.stderr)
+    print(f"共 {stats['total']}，处理 {stats['processed']}，跳过 {stats['skipped']}，"
+          f"失败 {stats['failed']}，用时 {stats['seconds']:.2f} 秒，{stats['per_second']:.1f} 张/秒")
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
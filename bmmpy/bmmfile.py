@@ -10,26 +10,91 @@ LICENSE  MulanPSL2
 
 import os
 import glob
+import fnmatch
+from typing import Iterator, Optional, Union
 from bmmpy import bmmstring
-from typeguard import typechecked
+from bmmpy.bmmcheck import typechecked
+
+
+# replace_text_in_file 每次读取的字符数
+REPLACE_CHUNK_SIZE = 1024 * 1024
+
+
+def _replace_stream(src, dst, replacer, chunk_size):
+    # 分块替换，每块末尾保留 最长键长度 - 1 个字符与下一块一起处理，
+    # 只提交在保留区之前开始的匹配，结果与整体替换相同
+    keep = max(replacer.max_key_length - 1, 0)
+    pattern = replacer.pattern
+    table = replacer.str_dict
+    count = 0
+    carry = ""
+    while True:
+        chunk = src.read(chunk_size)
+        buf = carry + chunk
+        if not chunk:
+            text, n = replacer.subn(buf)
+            dst.write(text)
+            return count + n
+        safe = len(buf) - keep
+        pos = 0
+        if pattern is not None:
+            for m in pattern.finditer(buf):
+                if m.start() >= safe:
+                    break
+                dst.write(buf[pos:m.start()])
+                dst.write(table[m.group()])
+                pos = m.end()
+                count += 1
+        if pos < safe:
+            dst.write(buf[pos:safe])
+            pos = safe
+        carry = buf[pos:]
 
 
 @typechecked
-def replace_text_in_file(file_path: str, str_dict: dict[str, str], encoding="utf-8") -> None:
+def replace_text_in_file(file_path: str, str_dict: dict[str, str], encoding="utf-8",
+                         cascade: bool = False, chunk_size: int = REPLACE_CHUNK_SIZE) -> int:
     """
     根据提供的字符串字典替换文件中的文本。
+    分块读取和替换，内存占用与文件大小无关；结果先写入同目录的临时文件，
+    再用 os.replace 替换原文件，中途出错时原文件不变。换行符保持原样，文件权限保留。
 
     Args:
         file_path (str): 要操作的文件路径。
         str_dict (dict[str, str]): 字符串字典，格式为 {"text_old1": "text_new1", "text_old2": "text_new2"}。
         encoding (str): 文件编码，默认为 "utf-8"。
+        cascade (bool): 是否依次替换，见 bmmstring.replace_string_by_dict。
+            依次替换需要整个文件读入内存，默认为 False。
+        chunk_size (int): 每次读取的字符数，默认为 REPLACE_CHUNK_SIZE。
 
     Returns:
-        None
+        int: 替换次数，cascade 为 True 时为 1（有变化）或 0。没有替换时不改写文件。
     """
-    text = read_text(file_path=file_path, encoding=encoding)
-    result = bmmstring.replace_string_by_dict(text=text, str_dict=str_dict)
-    write_text(file=file_path, text=result, encoding=encoding)
+    # 只在这里用到，不在导入 bmmfile 时加载
+    import shutil
+    import tempfile
+
+    dir_name = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(prefix="." + os.path.basename(file_path) + ".", suffix=".tmp",
+                                    dir=dir_name)
+    try:
+        # 先把 fd 交给文件对象，原文件打不开时 fd 也随之关闭
+        with open(fd, "wt", encoding=encoding, newline="") as dst, \
+                open(file_path, "rt", encoding=encoding, newline="") as src:
+            if cascade:
+                text = src.read()
+                result = bmmstring.replace_string_by_dict(text, str_dict, cascade=True)
+                count = int(result != text)
+                dst.write(result)
+            else:
+                count = _replace_stream(src, dst, bmmstring.get_replacer(str_dict), chunk_size)
+        if count:
+            shutil.copymode(file_path, tmp_path)
+            os.replace(tmp_path, file_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return count
 
 
 @typechecked
@@ -122,10 +187,175 @@ def exec_cmd_in_files(cmd: str, dir_name: str) -> None:
         os.system(cmd + "\"" + f + "\"")
 
 
+def _as_list(value):
+    if value is None:
+        return []
+    return [value] if isinstance(value, str) else list(value)
+
+
+def _match_any(path, patterns):
+    return any(fnmatch.fnmatch(path, pattern) for pattern in patterns)
+
+
+def _scan_dir(path, need_stat):
+    # 读取一个目录，返回 [(DirEntry, 是否目录)]，目录无法读取时返回空列表
+    # 在这里完成类型判断（和需要时的 stat），DirEntry 会缓存结果，多线程时这些系统调用在工作线程中执行
+    result = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                    if need_stat and not is_dir:
+                        entry.stat()
+                except OSError:
+                    continue
+                result.append((entry, is_dir))
+    except OSError:
+        pass
+    return result
+
+
+def _walk(root, recursive, descend, follow_links, threads, need_stat):
+    # 遍历目录树，生成 (DirEntry, 相对路径, 是否目录)，相对路径的分隔符为 "/"
+    # 单线程时顺序与 os.walk 相同（先序深度优先），多线程时顺序不确定
+    def children(rel, entries):
+        subdirs = []
+        for entry, is_dir in entries:
+            entry_rel = rel + entry.name
+            yield entry, entry_rel, is_dir
+            if is_dir and recursive and (follow_links or not entry.is_symlink()) and descend(entry_rel, entry.name):
+                subdirs.append((entry.path, entry_rel + "/"))
+        return subdirs
+
+    if threads <= 0:
+        stack = [(root, "")]
+        while stack:
+            path, rel = stack.pop()
+            subdirs = yield from children(rel, _scan_dir(path, need_stat))
+            stack.extend(reversed(subdirs))
+        return
+
+    # 只有多线程遍历时才导入 concurrent.futures
+    from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+    executor = ThreadPoolExecutor(threads, thread_name_prefix="bmmfile-walk")
+    try:
+        pending = {executor.submit(_scan_dir, root, need_stat): ""}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                rel = pending.pop(future)
+                subdirs = yield from children(rel, future.result())
+                for path, sub_rel in subdirs:
+                    pending[executor.submit(_scan_dir, path, need_stat)] = sub_rel
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _dir_filter(include_dirs, exclude_dirs):
+    include_dirs = _as_list(include_dirs)
+    exclude_dirs = _as_list(exclude_dirs)
+
+    def descend(rel, name):
+        if include_dirs and not _match_any(rel, include_dirs):
+            return False
+        return not (_match_any(name, exclude_dirs) or _match_any(rel, exclude_dirs))
+
+    return descend
+
+
+@typechecked
+def walk_files(path: str, recursive: bool = True, extensions: Union[str, list[str], tuple, None] = None,
+               patterns: Union[str, list[str], None] = None, exclude: Union[str, list[str], None] = None,
+               include_dirs: Union[str, list[str], None] = None,
+               exclude_dirs: Union[str, list[str], None] = None,
+               min_size: Optional[int] = None, max_size: Optional[int] = None,
+               min_mtime: Optional[float] = None, max_mtime: Optional[float] = None,
+               follow_links: bool = False, threads: int = 0) -> Iterator[str]:
+    """
+    遍历目录中的文件，逐个生成文件路径。
+    基于 os.scandir，使用目录项缓存的类型信息，不对每个文件重复 stat；
+    只有指定了大小或修改时间过滤时才 stat 文件。
+    通配符匹配相对 path 的路径（分隔符为 "/"），用 fnmatch 规则，"*" 可以匹配 "/"。
+
+    Args:
+        path (str): 目录路径。
+        recursive (bool): 是否递归子目录，默认为 True。
+        extensions (str | list[str] | tuple, optional): 扩展名，如 [".png", ".jpg"]，不区分大小写。
+        patterns (str | list[str], optional): 文件需要匹配其中一个通配符，如 "*.py"。
+        exclude (str | list[str], optional): 匹配其中一个通配符的文件被排除。
+        include_dirs (str | list[str], optional): 只进入相对路径匹配其中一个通配符的子目录，如 ["src", "src/*"]。
+        exclude_dirs (str | list[str], optional): 不进入名称或相对路径匹配其中一个通配符的子目录，如 [".git", "build"]。
+        min_size (int, optional): 最小文件大小（字节）。
+        max_size (int, optional): 最大文件大小（字节）。
+        min_mtime (float, optional): 最早修改时间（时间戳），不早于此时间的文件才返回。
+        max_mtime (float, optional): 最晚修改时间（时间戳），早于此时间的文件才返回。
+        follow_links (bool): 是否进入符号链接指向的目录，默认为 False。
+        threads (int): 读取目录的线程数，0 表示在当前线程中读取；
+            目录很多或在网络存储上时可以加快速度，此时返回顺序不确定。
+
+    Yields:
+        str: 文件路径。
+
+    Examples:
+        >>> for f in walk_files("screens", extensions=[".png"], exclude_dirs=".git"):
+        ...     print(f)
+        >>> big = list(walk_files("logs", patterns="*.log", min_size=1024 * 1024, threads=8))
+    """
+    extensions = tuple(e.lower() for e in _as_list(extensions))
+    patterns = _as_list(patterns)
+    exclude = _as_list(exclude)
+    need_stat = min_size is not None or max_size is not None or min_mtime is not None or max_mtime is not None
+    descend = _dir_filter(include_dirs, exclude_dirs)
+    for entry, rel, is_dir in _walk(path, recursive, descend, follow_links, threads, need_stat):
+        if is_dir:
+            continue
+        try:
+            if not entry.is_file():
+                continue
+            if extensions and not entry.name.lower().endswith(extensions):
+                continue
+            if patterns and not _match_any(rel, patterns):
+                continue
+            if exclude and _match_any(rel, exclude):
+                continue
+            if need_stat:
+                st = entry.stat()
+                if min_size is not None and st.st_size < min_size:
+                    continue
+                if max_size is not None and st.st_size > max_size:
+                    continue
+                if min_mtime is not None and st.st_mtime < min_mtime:
+                    continue
+                if max_mtime is not None and st.st_mtime >= max_mtime:
+                    continue
+        except OSError:
+            continue
+        yield entry.path
+
+
+@typechecked
+def walk_dirs(path: str, recursive: bool = True, include_dirs: Union[str, list[str], None] = None,
+              exclude_dirs: Union[str, list[str], None] = None, follow_links: bool = False,
+              threads: int = 0) -> Iterator[str]:
+    """
+    遍历目录中的子目录，逐个生成子目录路径，参数见 walk_files。
+    被 include_dirs、exclude_dirs 过滤掉的目录不返回也不进入。
+
+    Yields:
+        str: 子目录路径。
+    """
+    descend = _dir_filter(include_dirs, exclude_dirs)
+    for entry, rel, is_dir in _walk(path, recursive, descend, follow_links, threads, False):
+        if is_dir and descend(rel, entry.name):
+            yield entry.path
+
+
 @typechecked
 def find_sub_dirs(dir_name: str) -> list[str]:
     """
-    查找目录中的子文件夹
+    查找目录中的子文件夹，不包含以 "." 开头的隐藏文件夹
 
     Args:
         dir_name (str): 目录路径
@@ -133,11 +363,7 @@ def find_sub_dirs(dir_name: str) -> list[str]:
     Returns:
         list: 找到的子文件夹列表
     """
-    dir_list = []
-    for d in glob.glob(dir_name + "/*"):
-        if os.path.isdir(d):
-            dir_list.append(d)
-    return dir_list
+    return [d for d in walk_dirs(dir_name, recursive=False) if not os.path.basename(d).startswith(".")]
 
 
 @typechecked
@@ -152,19 +378,4 @@ def get_file_list(path: str, recursive: bool) -> list[str]:
     Returns:
         list: 包含所有文件的路径列表
     """
-    file_list = []
-    if not os.path.exists(path):
-        return file_list
-    if recursive:
-        for root, dirs, files in os.walk(path):
-            for i in files:
-                i_path = os.path.join(root, i)
-                if os.path.isfile(i_path):
-                    file_list.append(i_path)
-    else:
-        files = os.listdir(path)
-        for i in files:
-            i_path = os.path.join(path, i)
-            if os.path.isfile(i_path):
-                file_list.append(i_path)
-    return file_list
+    return list(walk_files(path, recursive))
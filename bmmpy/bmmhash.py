@@ -8,7 +8,7 @@ LICENSE  MulanPSL2
 """
 
 import hashlib
-from typeguard import typechecked
+from bmmpy.bmmcheck import typechecked
 
 
 @typechecked
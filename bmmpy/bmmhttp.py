@@ -10,7 +10,7 @@ LICENSE  MulanPSL2
 
 import urllib.request
 import re
-from typeguard import typechecked
+from bmmpy.bmmcheck import typechecked
 
 
 @typechecked
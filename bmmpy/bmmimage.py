@@ -8,9 +8,66 @@ LICENSE  MulanPSL2
 """
 
 
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, Optional, Union
 import numpy as np
 import cv2
-from typeguard import typechecked
+from bmmpy.bmmcheck import typechecked
+from bmmpy import bmmraw
+
+
+@typechecked
+def read_image(image: Union[str, np.ndarray], flags: int = cv2.IMREAD_COLOR) -> np.ndarray:
+    """
+    读取图像。扩展名为 bmmraw.RAW_EXTENSION 的原始帧文件映射为 numpy.memmap，不解码；
+    其他文件用 cv2.imread 读取；数组原样返回。
+
+    Args:
+        image (str | np.ndarray): 图像文件路径或图像数组。
+        flags (int): cv2.imread 的读取方式，数组忽略此参数。原始帧文件只处理 cv2.IMREAD_GRAYSCALE
+            和 cv2.IMREAD_COLOR，需要转换通道时返回转换后的数组而不是 memmap。默认为 cv2.IMREAD_COLOR。
+
+    Returns:
+        np.ndarray: 图像数组。
+
+    Raises:
+        ValueError: 无法读取图像文件时抛出。
+    """
+    if isinstance(image, np.ndarray):
+        return image
+    if image.lower().endswith(bmmraw.RAW_EXTENSION) and bmmraw.is_raw_frame(image):
+        result = bmmraw.read_raw_frame(image)
+        channels = 1 if result.ndim == 2 else result.shape[2]
+        if flags == cv2.IMREAD_GRAYSCALE and channels in (3, 4):
+            return cv2.cvtColor(result, cv2.COLOR_BGR2GRAY if channels == 3 else cv2.COLOR_BGRA2GRAY)
+        if flags == cv2.IMREAD_COLOR and channels in (1, 4):
+            return cv2.cvtColor(result, cv2.COLOR_GRAY2BGR if channels == 1 else cv2.COLOR_BGRA2BGR)
+        return result
+    result = cv2.imread(image, flags)
+    if result is None:
+        raise ValueError(f"无法读取图像文件: {image}")
+    return result
+
+
+@typechecked
+def write_image(image_path: str, image: np.ndarray) -> None:
+    """
+    保存图像。扩展名为 bmmraw.RAW_EXTENSION 时保存为原始帧文件，不编码；其他用 cv2.imwrite 保存。
+
+    Args:
+        image_path (str): 图像文件路径。
+        image (np.ndarray): 图像数组。
+
+    Raises:
+        ValueError: 无法保存图像文件时抛出。
+    """
+    if image_path.lower().endswith(bmmraw.RAW_EXTENSION):
+        bmmraw.write_raw_frame(image_path, image)
+    elif not cv2.imwrite(image_path, image):
+        raise ValueError(f"无法保存图像文件: {image_path}")
 
 
 @typechecked
@@ -63,15 +120,15 @@ def image_to_edges(image: np.ndarray, user_gray: bool = True, user_blur: bool =
 
 
 @typechecked
-def image_to_edges_file(image_path: str, edges_path: str, user_gray: bool = True,
+def image_to_edges_file(image_path: Union[str, np.ndarray], edges_path: str, user_gray: bool = True,
                         user_blur: bool = True, ksize: int = 3, sigma: float = 1.0,
                         canny_high: int = 50, canny_low: int = 150) -> None:
     """
     使用 OpenCV 获取图像的边缘图并保存到文件。
 
     Args:
-        image_path (str): 输入的图像文件路径。
-        edges_path (str): 输出的边缘图像文件路径。
+        image_path (str | np.ndarray): 输入的图像文件路径，也可以是图像数组或 bmmraw 映射的数组。
+        edges_path (str): 输出的边缘图像文件路径，扩展名为 bmmraw.RAW_EXTENSION 时保存为原始帧文件。
         user_gray (bool, optional): 是否将图像转为灰度图。 默认为 True。
         user_blur (bool, optional): 是否对图像进行高斯模糊。 默认为 True。
         ksize (int, optional): 高斯模糊核的大小，必须是奇数。 默认为 3。
@@ -83,16 +140,106 @@ def image_to_edges_file(image_path: str, edges_path: str, user_gray: bool = True
         ValueError: 如果无法读取图像文件或参数不合法。
     """
     # 读取图像
-    image = cv2.imread(image_path)
-    if image is None:
-        raise ValueError(f"无法读取图像文件: {image_path}")
+    image = read_image(image_path)
 
     # 获取边缘图
     edges = image_to_edges(image, user_gray, user_blur,
                            ksize, sigma, canny_high, canny_low)
 
     # 保存边缘图
-    cv2.imwrite(edges_path, edges)
+    write_image(edges_path, edges)
+
+
+# image_to_edges_stack 的线程池和每个线程重复使用的中间缓冲区
+_edges_pool = None
+_edges_pool_workers = 0
+_edges_pool_lock = threading.Lock()
+_edges_local = threading.local()
+
+
+def _get_edges_pool(workers):
+    # 线程池只增大不缩小，调用方通过分段数量限制并行度；
+    # 需要更多线程时换成更大的线程池，旧线程池不 shutdown，其他线程仍可向它提交任务，
+    # 不再被引用后其线程自动退出
+    global _edges_pool, _edges_pool_workers
+    with _edges_pool_lock:
+        if _edges_pool is None or _edges_pool_workers < workers:
+            _edges_pool_workers = max(workers, os.cpu_count() or 1)
+            _edges_pool = ThreadPoolExecutor(_edges_pool_workers, thread_name_prefix="bmmimage-edges")
+        return _edges_pool
+
+
+def _local_buffer(name, shape):
+    buf = getattr(_edges_local, name, None)
+    if buf is None or buf.shape != shape:
+        buf = np.empty(shape, dtype=np.uint8)
+        setattr(_edges_local, name, buf)
+    return buf
+
+
+def _edges_range(frames, out, start, stop, p):
+    # 处理 frames[start:stop]，结果直接写入 out 对应的帧
+    shape = frames.shape[1:3]
+    for i in range(start, stop):
+        image = frames[i]
+        if p["user_gray"] and image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=_local_buffer("gray", shape))
+        if p["user_blur"]:
+            image = cv2.GaussianBlur(image, (p["ksize"], p["ksize"]), p["sigma"],
+                                     dst=_local_buffer("blur", image.shape))
+        cv2.Canny(image, p["canny_low"], p["canny_high"], edges=out[i])
+
+
+@typechecked
+def image_to_edges_stack(frames: np.ndarray, user_gray: bool = True, user_blur: bool = True,
+                         ksize: int = 3, sigma: float = 1.0, canny_high: int = 50,
+                         canny_low: int = 150, out: Optional[np.ndarray] = None,
+                         workers: Optional[int] = None) -> np.ndarray:
+    """
+    批量将一组帧转换为边缘图，参数与 image_to_edges 相同。
+    帧按线程数分段，在线程池中并行处理（OpenCV 计算时释放 GIL），
+    每个线程重复使用自己的中间缓冲区，边缘图直接写入 out。
+
+    Args:
+        frames (np.ndarray): 形状为 (N, H, W, C) 的彩色帧或 (N, H, W) 的灰度帧，uint8。
+        user_gray, user_blur, ksize, sigma, canny_high, canny_low: 见 image_to_edges。
+        out (np.ndarray, optional): 形状为 (N, H, W) 的 uint8 输出数组，连续调用时传入可避免重新分配。
+        workers (int, optional): 线程数，默认为 CPU 数量。
+
+    Returns:
+        np.ndarray: 形状为 (N, H, W) 的边缘图，传入 out 时即为 out。
+
+    Raises:
+        ValueError: frames 或 out 的形状、类型不符合要求时抛出。
+
+    Examples:
+        >>> out = None
+        >>> for batch in batches:
+        ...     out = image_to_edges_stack(batch, out=out)
+    """
+    if frames.ndim not in (3, 4) or frames.dtype != np.uint8:
+        raise ValueError(f"frames 需要是 (N, H, W[, C]) 的 uint8 数组: {frames.shape} {frames.dtype}")
+    shape = frames.shape[:3]
+    if out is None:
+        out = np.empty(shape, dtype=np.uint8)
+    elif out.shape != shape or out.dtype != np.uint8 or not out.flags.c_contiguous:
+        raise ValueError(f"out 需要是形状为 {shape} 的连续 uint8 数组: {out.shape} {out.dtype}")
+    n = shape[0]
+    if n == 0:
+        return out
+    p = {"user_gray": user_gray, "user_blur": user_blur, "ksize": ksize, "sigma": sigma,
+         "canny_high": canny_high, "canny_low": canny_low}
+    workers = min(workers or os.cpu_count() or 1, n)
+    if workers == 1:
+        _edges_range(frames, out, 0, n, p)
+        return out
+    bounds = [n * i // workers for i in range(workers + 1)]
+    pool = _get_edges_pool(workers)
+    futures = [pool.submit(_edges_range, frames, out, bounds[i], bounds[i + 1], p)
+               for i in range(workers)]
+    for future in futures:
+        future.result()
+    return out
 
 
 @typechecked
@@ -146,14 +293,15 @@ def image_match(src_image: np.ndarray, match_image: np.ndarray, method: int = cv
 
 
 @typechecked
-def image_match_file(src_path: str, match_path: str, method: int = cv2.TM_CCOEFF_NORMED
+def image_match_file(src_path: Union[str, np.ndarray], match_path: Union[str, np.ndarray],
+                     method: int = cv2.TM_CCOEFF_NORMED
                      ) -> tuple[tuple[int, int], tuple[int, int]]:
     """
     使用 OpenCV 进行模板匹配。
 
     Args:
-        src_path (str): 源图像文件路径。
-        match_path (str): 要匹配的模板图像文件路径。
+        src_path (str | np.ndarray): 源图像文件路径，也可以是图像数组或 bmmraw 映射的数组。
+        match_path (str | np.ndarray): 要匹配的模板图像文件路径，也可以是图像数组。
         method (int, optional): 模板匹配的方法。默认为 cv2.TM_CCOEFF_NORMED。
             支持的比较方法包括：
             - 'cv.TM_CCOEFF'
@@ -179,11 +327,8 @@ def image_match_file(src_path: str, match_path: str, method: int = cv2.TM_CCOEFF
         此函数依赖于 OpenCV 库，需确保已正确安装并导入。
     """
     # 读取源图像和模板图像
-    src_image = cv2.imread(src_path, cv2.IMREAD_COLOR)
-    match_image = cv2.imread(match_path, cv2.IMREAD_COLOR)
-
-    if src_image is None or match_image is None:
-        raise ValueError("无法读取图像文件")
+    src_image = read_image(src_path, cv2.IMREAD_COLOR)
+    match_image = read_image(match_path, cv2.IMREAD_COLOR)
 
     # 获取模板图像的宽度和高度
     h, w = match_image.shape[:2]
@@ -203,3 +348,495 @@ def image_match_file(src_path: str, match_path: str, method: int = cv2.TM_CCOEFF
     bottom_right = (top_left[0] + w, top_left[1] + h)
 
     return top_left, bottom_right
+
+
+def _score_map(result: np.ndarray, method: int) -> np.ndarray:
+    # 统一为分数越大越匹配，TM_SQDIFF_NORMED 转为 1 - 差值
+    if method == cv2.TM_SQDIFF_NORMED:
+        return 1.0 - result
+    if method in [cv2.TM_CCOEFF_NORMED, cv2.TM_CCORR_NORMED]:
+        return result
+    raise ValueError(f"只支持归一化的匹配方法: {method}")
+
+
+def _find_peaks(score: np.ndarray, threshold: float, min_distance: int = 1) -> tuple[np.ndarray, np.ndarray]:
+    # 用膨胀找局部最大值，减少候选点数量，返回 (ys, xs)
+    size = 2 * max(min_distance, 1) + 1
+    local_max = cv2.dilate(score, np.ones((size, size), np.uint8))
+    return np.nonzero((score >= threshold) & (score >= local_max))
+
+
+@typechecked
+def non_max_suppression(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float = 0.3) -> np.ndarray:
+    """
+    非极大值抑制，去掉与更高分框重叠过多的框。
+
+    Args:
+        boxes (np.ndarray): 形状为 (N, 4) 的框，每行为 (x1, y1, x2, y2)。
+        scores (np.ndarray): 形状为 (N,) 的分数。
+        iou_threshold (float): 重叠比例（IoU）大于此值的框被去掉，默认为 0.3。
+
+    Returns:
+        np.ndarray: 保留的框的下标，按分数从高到低排列。
+
+    Examples:
+        >>> boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [50, 50, 60, 60]])
+        >>> non_max_suppression(boxes, np.array([0.9, 0.8, 0.7]))
+        array([0, 2])
+    """
+    boxes = boxes.astype(np.float64, copy=False)
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = (x2 - x1) * (y2 - y1)
+    order = np.argsort(scores, kind="stable")[::-1]
+    keep = []
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        w = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        h = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        inter = w * h
+        iou = inter / (areas[i] + areas[rest] - inter)
+        order = rest[iou <= iou_threshold]
+    return np.array(keep, dtype=np.intp)
+
+
+@typechecked
+def image_match_pyramid(src_image: np.ndarray, match_image: np.ndarray, method: int = cv2.TM_CCOEFF_NORMED,
+                        levels: int = 2, candidates: int = 3, margin: int = 4, min_size: int = 8
+                        ) -> tuple[tuple[int, int], tuple[int, int], float]:
+    """
+    使用图像金字塔由粗到细进行模板匹配。
+    先在缩小 2^levels 倍的源图和模板上找出若干候选位置，
+    再只在原图中候选位置附近的小窗口内精确匹配，适合大尺寸截图。
+
+    Args:
+        src_image (np.ndarray): 源图像。
+        match_image (np.ndarray): 要匹配的模板图像。
+        method (int, optional): 模板匹配的方法。默认为 cv2.TM_CCOEFF_NORMED。
+        levels (int, optional): 金字塔层数，每层缩小一半，0 等同于 image_match。默认为 2。
+        candidates (int, optional): 粗匹配保留的候选数量，至少为 1，越多越准确但越慢。默认为 3。
+        margin (int, optional): 精确匹配时候选窗口向外扩展的像素数。默认为 4。
+        min_size (int, optional): 缩小后模板的最小边长，不足时自动减少层数。默认为 8。
+
+    Returns:
+        tuple: (top_left, bottom_right, score)，score 为该方法的匹配值，
+            TM_SQDIFF 和 TM_SQDIFF_NORMED 越小越匹配，其他方法越大越匹配。
+
+    Raises:
+        ValueError: candidates 小于 1 时抛出。
+
+    Examples:
+        >>> top_left, bottom_right, score = image_match_pyramid(src, template, levels=3)
+
+    Note:
+        层数越多越快，但模板中的细节在缩小后丢失，可能找错位置；可增加 candidates 弥补。
+    """
+    if candidates < 1:
+        raise ValueError(f"候选数量 candidates 必须大于 0: {candidates}")
+    h, w = match_image.shape[:2]
+    sqdiff = method in [cv2.TM_SQDIFF, cv2.TM_SQDIFF_NORMED]
+
+    def match_full():
+        min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(cv2.matchTemplate(src_image, match_image, method))
+        top_left = min_loc if sqdiff else max_loc
+        return top_left, (top_left[0] + w, top_left[1] + h), float(min_val if sqdiff else max_val)
+
+    # 模板太小时减少层数
+    while levels > 0 and min(h, w) >> levels < min_size:
+        levels -= 1
+
+    small_src, small_match = src_image, match_image
+    for _ in range(levels):
+        small_src = cv2.pyrDown(small_src)
+        small_match = cv2.pyrDown(small_match)
+
+    if levels == 0:
+        return match_full()
+
+    # 粗匹配，统一为越大越匹配后取前 candidates 个位置
+    result = cv2.matchTemplate(small_src, small_match, method)
+    if sqdiff:
+        result = -result
+    sh, sw = small_match.shape[:2]
+    coarse = []
+    for _ in range(candidates):
+        _, val, _, loc = cv2.minMaxLoc(result)
+        if val == -np.inf:
+            break
+        coarse.append(loc)
+        x, y = loc
+        result[max(y - sh // 2, 0):y + sh // 2 + 1, max(x - sw // 2, 0):x + sw // 2 + 1] = -np.inf
+    if not coarse:
+        # 粗匹配结果全部无效（如都是 NaN），退回在原图上完整匹配
+        return match_full()
+
+    # 在原图候选窗口内精确匹配
+    scale = 1 << levels
+    pad = margin + scale
+    src_h, src_w = src_image.shape[:2]
+    best_val, best_loc = None, (0, 0)
+    for cx, cy in coarse:
+        x0, y0 = max(cx * scale - pad, 0), max(cy * scale - pad, 0)
+        x1, y1 = min(cx * scale + w + pad, src_w), min(cy * scale + h + pad, src_h)
+        result = cv2.matchTemplate(src_image[y0:y1, x0:x1], match_image, method)
+        min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
+        val, loc = (min_val, min_loc) if sqdiff else (max_val, max_loc)
+        if best_val is None or (val < best_val if sqdiff else val > best_val):
+            best_val, best_loc = val, (loc[0] + x0, loc[1] + y0)
+
+    top_left = best_loc
+    bottom_right = (top_left[0] + w, top_left[1] + h)
+    return top_left, bottom_right, float(best_val)
+
+
+class MatchResult:
+    """
+    模板匹配结果。
+    可以像 image_match 的返回值一样解包：top_left, bottom_right = result。
+
+    Attributes:
+        top_left (tuple[int, int]): 左上角坐标 (x, y)。
+        bottom_right (tuple[int, int]): 右下角坐标 (x, y)。
+        score (float): 匹配值，TM_SQDIFF 和 TM_SQDIFF_NORMED 越小越匹配，其他方法越大越匹配。
+        method (int): 匹配方法。
+        elapsed (float): 匹配耗时（秒）。
+    """
+
+    __slots__ = ("top_left", "bottom_right", "score", "method", "elapsed")
+
+    def __init__(self, top_left: tuple[int, int], bottom_right: tuple[int, int], score: float,
+                 method: int, elapsed: float):
+        self.top_left = top_left
+        self.bottom_right = bottom_right
+        self.score = score
+        self.method = method
+        self.elapsed = elapsed
+
+    def __iter__(self):
+        return iter((self.top_left, self.bottom_right))
+
+    @property
+    def center(self) -> tuple[int, int]:
+        """ 中心点坐标，可直接用于 AdbUtils.touch """
+        return ((self.top_left[0] + self.bottom_right[0]) // 2,
+                (self.top_left[1] + self.bottom_right[1]) // 2)
+
+    def __repr__(self):
+        return (f"MatchResult({self.top_left}, {self.bottom_right}, score={self.score:.4f}, "
+                f"method={self.method}, elapsed={self.elapsed * 1000:.2f}ms)")
+
+
+def _is_sqdiff(method: int) -> bool:
+    return method in [cv2.TM_SQDIFF, cv2.TM_SQDIFF_NORMED]
+
+
+@typechecked
+def image_match_result(src_image: np.ndarray, match_image: np.ndarray, method: int = cv2.TM_CCOEFF_NORMED,
+                       threshold: Optional[float] = None) -> Optional[MatchResult]:
+    """
+    使用 OpenCV 进行模板匹配，返回包含匹配值的结果，匹配值未达到阈值时返回 None。
+
+    Args:
+        src_image (np.ndarray): 源图像。
+        match_image (np.ndarray): 要匹配的模板图像。
+        method (int, optional): 模板匹配的方法。默认为 cv2.TM_CCOEFF_NORMED。
+        threshold (float, optional): 阈值，TM_SQDIFF 类方法匹配值大于阈值、其他方法小于阈值时
+            视为没有找到。默认为 None，总是返回最佳位置。
+
+    Returns:
+        MatchResult | None: 匹配结果，没有找到时为 None。
+
+    Examples:
+        >>> result = image_match_result(src, template, threshold=0.9)
+        >>> if result is not None:
+        ...     adb.touch(*result.center)
+    """
+    start = time.perf_counter()
+    h, w = match_image.shape[:2]
+    result = cv2.matchTemplate(src_image, match_image, method)
+    min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
+    if _is_sqdiff(method):
+        top_left, score = min_loc, min_val
+        found = threshold is None or score <= threshold
+    else:
+        top_left, score = max_loc, max_val
+        found = threshold is None or score >= threshold
+    if not found:
+        return None
+    bottom_right = (top_left[0] + w, top_left[1] + h)
+    return MatchResult(top_left, bottom_right, float(score), method, time.perf_counter() - start)
+
+
+@typechecked
+def image_match_file_result(src_path: Union[str, np.ndarray], match_path: Union[str, np.ndarray],
+                            method: int = cv2.TM_CCOEFF_NORMED,
+                            threshold: Optional[float] = None, gray: bool = False) -> Optional[MatchResult]:
+    """
+    读取图像文件进行模板匹配，返回包含匹配值的结果，匹配值未达到阈值时返回 None。
+
+    Args:
+        src_path (str | np.ndarray): 源图像文件路径，也可以是图像数组或 bmmraw 映射的数组。
+        match_path (str | np.ndarray): 要匹配的模板图像文件路径，也可以是图像数组。
+        method (int, optional): 模板匹配的方法。默认为 cv2.TM_CCOEFF_NORMED。
+        threshold (float, optional): 阈值，见 image_match_result。默认为 None。
+        gray (bool, optional): 是否以灰度读取图像，比彩色读取和匹配更快。默认为 False。
+
+    Returns:
+        MatchResult | None: 匹配结果，没有找到时为 None。
+
+    Raises:
+        ValueError: 当图像文件无法读取时抛出异常。
+    """
+    flag = cv2.IMREAD_GRAYSCALE if gray else cv2.IMREAD_COLOR
+    src_image = read_image(src_path, flag)
+    match_image = read_image(match_path, flag)
+
+    return image_match_result(src_image, match_image, method, threshold)
+
+
+@typechecked
+def image_match_all(src_image: np.ndarray, match_image: np.ndarray, threshold: float,
+                    method: int = cv2.TM_CCOEFF_NORMED, min_distance: Optional[int] = None,
+                    iou_threshold: float = 0.3, max_count: int = 0) -> list[MatchResult]:
+    """
+    使用 OpenCV 进行模板匹配，返回所有达到阈值的位置。
+    在匹配结果图上用 NumPy 向量化提取局部极值，再用非极大值抑制去掉重叠的位置。
+
+    Args:
+        src_image (np.ndarray): 源图像。
+        match_image (np.ndarray): 要匹配的模板图像。
+        threshold (float): 阈值，TM_SQDIFF 类方法不大于阈值、其他方法不小于阈值的位置视为匹配。
+        method (int, optional): 模板匹配的方法。默认为 cv2.TM_CCOEFF_NORMED。
+        min_distance (int, optional): 局部极值的最小间距（像素），默认为模板短边的四分之一。
+        iou_threshold (float, optional): 非极大值抑制的重叠比例。默认为 0.3。
+        max_count (int, optional): 最多返回的数量，0 表示不限制。默认为 0。
+
+    Returns:
+        list[MatchResult]: 匹配结果，按匹配程度从高到低排列。
+
+    Examples:
+        >>> for r in image_match_all(src, template, 0.9):
+        ...     print(r.top_left, r.score)
+    """
+    start = time.perf_counter()
+    h, w = match_image.shape[:2]
+    result = cv2.matchTemplate(src_image, match_image, method)
+
+    # 统一为越大越匹配
+    if _is_sqdiff(method):
+        result, threshold = -result, -threshold
+    if min_distance is None:
+        min_distance = min(w, h) // 4
+    ys, xs = _find_peaks(result, threshold, min_distance)
+    scores = result[ys, xs]
+    boxes = np.stack([xs, ys, xs + w, ys + h], axis=1)
+    keep = non_max_suppression(boxes, scores, iou_threshold)
+    if max_count > 0:
+        keep = keep[:max_count]
+    if _is_sqdiff(method):
+        scores = -scores
+
+    elapsed = time.perf_counter() - start
+    return [MatchResult((int(xs[i]), int(ys[i])), (int(xs[i]) + w, int(ys[i]) + h), float(scores[i]),
+                        method, elapsed) for i in keep]
+
+
+@typechecked
+def frame_thumbnail(image: np.ndarray, scale: float = 0.125,
+                    roi: Optional[tuple[int, int, int, int]] = None) -> np.ndarray:
+    """
+    生成用于比较帧变化的缩小灰度图。
+
+    Args:
+        image (np.ndarray): 输入图像，彩色（BGR）或灰度。
+        scale (float): 缩小比例，默认为 0.125。
+        roi (tuple[int, int, int, int], optional): 只取区域 (x, y, width, height)，默认为整帧。
+
+    Returns:
+        np.ndarray: 缩小后的灰度图。
+    """
+    if roi is not None:
+        x, y, w, h = roi
+        image = image[y:y + h, x:x + w]
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+
+@typechecked
+def frame_diff(thumb1: np.ndarray, thumb2: np.ndarray, mask: Optional[np.ndarray] = None) -> float:
+    """
+    计算两张缩小灰度图的平均差值。
+
+    Args:
+        thumb1 (np.ndarray): 第一张图，通常来自 frame_thumbnail。
+        thumb2 (np.ndarray): 第二张图，大小与第一张相同。
+        mask (np.ndarray, optional): 与图同样大小的掩码，为 0 的像素不参与比较。
+
+    Returns:
+        float: 平均差值，范围 0 ~ 255。
+    """
+    return cv2.mean(cv2.absdiff(thumb1, thumb2), mask)[0]
+
+
+@typechecked
+class FrameChangeDetector:
+    """
+    帧变化检测。
+    每帧缩小为灰度图后与参考帧比较，平均差值达到阈值视为变化，并把该帧设为新的参考帧。
+    大多数帧与上一帧相同时，可以用它跳过模板匹配。
+
+    Examples:
+        >>> detector = FrameChangeDetector(threshold=2.0, roi=(0, 100, 1080, 2000))
+        >>> if detector.update(frame):
+        ...     hits = matcher.match(frame)
+    """
+
+    def __init__(self, threshold: float = 2.0, scale: float = 0.125,
+                 roi: Optional[tuple[int, int, int, int]] = None, mask: Optional[np.ndarray] = None):
+        """
+        Args:
+            threshold (float): 平均差值（0 ~ 255）达到此值视为变化，默认为 2.0。
+            scale (float): 比较前的缩小比例，默认为 0.125。
+            roi (tuple[int, int, int, int], optional): 只比较区域 (x, y, width, height)。
+            mask (np.ndarray, optional): 与比较区域同样大小的掩码，为 0 的像素不参与比较，
+                如时钟、进度条等一直变化的部分。
+        """
+        self.__threshold = threshold
+        self.__scale = scale
+        self.__roi = roi
+        self.__mask = mask
+        self.__small_mask = None
+        self.__reference = None
+        self.__last_diff = 0.0
+        self.__stable_count = 0
+
+    @property
+    def last_diff(self) -> float:
+        """ 最近一帧与参考帧的平均差值 """
+        return self.__last_diff
+
+    @property
+    def stable_count(self) -> int:
+        """ 参考帧之后连续没有变化的帧数 """
+        return self.__stable_count
+
+    def reset(self, reference: Optional[np.ndarray] = None) -> None:
+        """ 清除参考帧，或以 reference 为参考帧 """
+        self.__reference = None if reference is None else self.__thumbnail(reference)
+        self.__last_diff = 0.0
+        self.__stable_count = 0
+
+    def __thumbnail(self, frame):
+        thumb = frame_thumbnail(frame, self.__scale, self.__roi)
+        if self.__mask is not None and (self.__small_mask is None or self.__small_mask.shape != thumb.shape):
+            self.__small_mask = cv2.resize(self.__mask, (thumb.shape[1], thumb.shape[0]),
+                                           interpolation=cv2.INTER_NEAREST)
+        return thumb
+
+    def update(self, frame: np.ndarray) -> bool:
+        """
+        输入一帧，返回与参考帧相比是否变化，第一帧总是视为变化。
+
+        Args:
+            frame (np.ndarray): 帧图像，彩色（BGR）或灰度。
+
+        Returns:
+            bool: 是否变化。
+        """
+        thumb = self.__thumbnail(frame)
+        if self.__reference is None or self.__reference.shape != thumb.shape:
+            self.__reference = thumb
+            self.__stable_count = 0
+            return True
+        self.__last_diff = frame_diff(self.__reference, thumb, self.__small_mask)
+        if self.__last_diff >= self.__threshold:
+            self.__reference = thumb
+            self.__stable_count = 0
+            return True
+        self.__stable_count += 1
+        return False
+
+
+@typechecked
+def changed_frames(frames: Iterable[np.ndarray], threshold: float = 2.0, scale: float = 0.125,
+                   roi: Optional[tuple[int, int, int, int]] = None,
+                   mask: Optional[np.ndarray] = None) -> Iterator[np.ndarray]:
+    """
+    从帧序列中只取出有变化的帧。
+
+    Args:
+        frames (Iterable[np.ndarray]): 帧序列，如 AdbUtils.screenFrames()。
+        threshold, scale, roi, mask: 见 FrameChangeDetector。
+
+    Returns:
+        Iterator[np.ndarray]: 有变化的帧。
+
+    Examples:
+        >>> for frame in changed_frames(adb.screenFrames()):
+        ...     hits = matcher.match(frame)
+    """
+    detector = FrameChangeDetector(threshold, scale, roi, mask)
+    for frame in frames:
+        if detector.update(frame):
+            yield frame
+
+
+@typechecked
+def wait_frames_stable(frames: Iterable[np.ndarray], stable_frames: int = 2, timeout: Optional[float] = None,
+                       threshold: float = 2.0, scale: float = 0.125,
+                       roi: Optional[tuple[int, int, int, int]] = None,
+                       mask: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+    """
+    等待画面稳定：连续 stable_frames 帧没有变化。
+
+    Args:
+        frames (Iterable[np.ndarray]): 帧序列。
+        stable_frames (int): 连续没有变化的帧数，默认为 2。
+        timeout (float, optional): 超时秒数，默认为 None 不超时。
+        threshold, scale, roi, mask: 见 FrameChangeDetector。
+
+    Returns:
+        np.ndarray | None: 稳定时的最后一帧，超时或帧序列结束时为 None。
+    """
+    detector = FrameChangeDetector(threshold, scale, roi, mask)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    for frame in frames:
+        detector.update(frame)
+        if detector.stable_count >= stable_frames:
+            return frame
+        if deadline is not None and time.monotonic() >= deadline:
+            return None
+    return None
+
+
+@typechecked
+def wait_frames_changed(frames: Iterable[np.ndarray], reference: Optional[np.ndarray] = None,
+                        timeout: Optional[float] = None, threshold: float = 2.0, scale: float = 0.125,
+                        roi: Optional[tuple[int, int, int, int]] = None,
+                        mask: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+    """
+    等待画面变化。
+
+    Args:
+        frames (Iterable[np.ndarray]): 帧序列。
+        reference (np.ndarray, optional): 参考帧，默认为帧序列的第一帧。
+        timeout (float, optional): 超时秒数，默认为 None 不超时。
+        threshold, scale, roi, mask: 见 FrameChangeDetector。
+
+    Returns:
+        np.ndarray | None: 第一帧有变化的帧，超时或帧序列结束时为 None。
+    """
+    detector = FrameChangeDetector(threshold, scale, roi, mask)
+    if reference is not None:
+        detector.reset(reference)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    first = reference is None
+    for frame in frames:
+        if detector.update(frame) and not first:
+            return frame
+        first = False
+        if deadline is not None and time.monotonic() >= deadline:
+            return None
+    return None
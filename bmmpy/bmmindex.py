@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+"""
+LICENSE  MulanPSL2
+@author  cnhemiya@qq.com
+@date    2026-10-17 18:10
+
+@brief 持久化的文件索引（SQLite），两次扫描之间找出新增、修改和删除的文件。
+"""
+
+
+import os
+import time
+import sqlite3
+from typing import Union
+from bmmpy.bmmcheck import typechecked
+
+
+# 修改时间距扫描开始不到此秒数的目录，下次扫描时不信任其修改时间，
+# 避免同一时间粒度内的后续修改被漏掉
+_RACY_SECONDS = 2.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    dir TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files (dir);
+"""
+
+
+def _parent(rel):
+    return rel.rsplit("/", 1)[0] if "/" in rel else ""
+
+
+def _join(rel, name):
+    return f"{rel}/{name}" if rel else name
+
+
+@typechecked
+class ScanResult:
+    """
+    一次扫描的结果，路径都是完整路径（root 与相对路径拼接）。
+    """
+
+    def __init__(self, added: set[str], modified: set[str], deleted: set[str], total: int,
+                 listed_dirs: int, skipped_dirs: int, seconds: float):
+        self.added = added
+        self.modified = modified
+        self.deleted = deleted
+        self.total = total
+        self.listed_dirs = listed_dirs
+        self.skipped_dirs = skipped_dirs
+        self.seconds = seconds
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.modified or self.deleted)
+
+    def __repr__(self) -> str:
+        return (f"ScanResult(added={len(self.added)}, modified={len(self.modified)}, "
+                f"deleted={len(self.deleted)}, total={self.total}, seconds={self.seconds:.3f})")
+
+    @property
+    def changed(self) -> list[str]:
+        """
+        新增和修改的文件，已排序，可直接传给 bmmedges.image_to_edges_files、bmmreplace.replace_in_files。
+        scan(deep=False) 时不含所在目录没有增删文件的原地修改，见 FileIndex.scan。
+        """
+        return sorted(self.added | self.modified)
+
+
+@typechecked
+class FileIndex:
+    """
+    持久化的文件索引。
+    记录 root 下每个文件的相对路径、大小、修改时间和 inode，以及每个目录的修改时间。
+    再次扫描时，修改时间没变的目录不重新列出（其中的文件没有增删），只进入它已知的子目录；
+    deep 为 True 时仍会 stat 这些目录中的文件以发现内容修改。
+    原地改写文件不会改变目录的修改时间，文件可能被原地修改时（如文本编辑）应使用 scan(deep=True)。
+
+    Examples:
+        >>> with FileIndex("screens", "screens.db", extensions=[".png"]) as index:
+        ...     result = index.scan()
+        ...     bmmedges.image_to_edges_files(result.changed, "edges", src_root=index.root)
+        >>> with FileIndex("src", "src.db", exclude_dirs=[".git"]) as index:
+        ...     bmmreplace.replace_in_files(index.scan(deep=True).changed, {"old_name": "new_name"})
+    """
+
+    def __init__(self, root: str, db_path: str, extensions: Union[str, list[str], tuple, None] = None,
+                 exclude_dirs: Union[str, list[str], None] = None):
+        """
+        Args:
+            root (str): 根目录。
+            db_path (str): SQLite 数据库文件路径，":memory:" 表示不保存。
+            extensions (str | list[str] | tuple, optional): 只索引这些扩展名的文件，不区分大小写。
+            exclude_dirs (str | list[str], optional): 不进入这些名称的目录，如 [".git"]。
+                extensions、exclude_dirs 变化后需要 clear 重建索引。
+        """
+        if isinstance(extensions, str):
+            extensions = [extensions]
+        if isinstance(exclude_dirs, str):
+            exclude_dirs = [exclude_dirs]
+        self.__root = root
+        self.__extensions = tuple(e.lower() for e in extensions or ())
+        self.__exclude_dirs = set(exclude_dirs or ())
+        self.__db = sqlite3.connect(db_path)
+        self.__db.executescript(_SCHEMA)
+
+    def __enter__(self) -> "FileIndex":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.__db.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    @property
+    def root(self) -> str:
+        """ 根目录 """
+        return self.__root
+
+    def close(self) -> None:
+        """ 关闭数据库 """
+        self.__db.close()
+
+    def clear(self) -> None:
+        """ 清空索引，下次扫描时所有文件都是新增 """
+        with self.__db:
+            self.__db.execute("DELETE FROM files")
+            self.__db.execute("DELETE FROM dirs")
+
+    def files(self) -> list[str]:
+        """ 索引中的所有文件，已排序 """
+        rows = self.__db.execute("SELECT path FROM files ORDER BY path")
+        return [os.path.join(self.__root, path) for path, in rows]
+
+    def __full(self, rel):
+        return os.path.join(self.__root, rel) if rel else self.__root
+
+    def __wanted(self, name):
+        return not self.__extensions or name.lower().endswith(self.__extensions)
+
+    def scan(self, deep: bool = False) -> ScanResult:
+        """
+        扫描根目录，更新索引并返回与上次扫描相比的变化。第一次扫描时所有文件都是新增。
+
+        deep 为 False 时只发现增删文件或替换文件（写临时文件再改名）造成的变化：
+        原地改写文件内容不改变所在目录的修改时间，如果该目录中没有文件增删，
+        这样的修改不会出现在结果中，直到以后某次 deep 扫描或该目录发生增删。
+
+        Args:
+            deep (bool): 是否 stat 修改时间没变的目录中的文件，以发现原地修改的文件，默认为 False。
+                文件可能被原地修改时应设为 True，每个文件多一次 stat。
+
+        Returns:
+            ScanResult: 新增、修改、删除的文件。
+        """
+        start = time.time()
+        racy_ns = int((start - _RACY_SECONDS) * 1e9)
+        db = self.__db
+        old_dirs = dict(db.execute("SELECT path, mtime_ns FROM dirs"))
+        children = {}
+        for rel in old_dirs:
+            if rel:
+                children.setdefault(_parent(rel), []).append(rel)
+
+        added, modified, deleted = [], [], []
+        file_rows = []      # (path, dir, size, mtime_ns, inode) 新增或修改
+        file_deletes = []   # (path,)
+        dir_rows = []       # (path, mtime_ns)
+        seen_dirs = set()
+        listed = skipped = 0
+
+        def old_files(rel):
+            return {path: (size, mtime_ns, inode) for path, size, mtime_ns, inode in
+                    db.execute("SELECT path, size, mtime_ns, inode FROM files WHERE dir = ?", (rel,))}
+
+        def compare(path, rel, st, old):
+            row = (st.st_size, st.st_mtime_ns, st.st_ino)
+            if old is None:
+                added.append(path)
+            elif old != row:
+                modified.append(path)
+            else:
+                return
+            file_rows.append((path, rel) + row)
+
+        stack = [""]
+        while stack:
+            rel = stack.pop()
+            try:
+                dir_mtime = os.stat(self.__full(rel)).st_mtime_ns
+            except OSError:
+                continue
+            seen_dirs.add(rel)
+            dir_rows.append((rel, 0 if dir_mtime >= racy_ns else dir_mtime))
+
+            if old_dirs.get(rel) == dir_mtime:
+                # 目录内容没有增删，沿用已知的子目录
+                skipped += 1
+                stack.extend(children.get(rel, ()))
+                if deep:
+                    for path, old in old_files(rel).items():
+                        try:
+                            st = os.stat(self.__full(path))
+                        except OSError:
+                            deleted.append(path)
+                            file_deletes.append((path,))
+                            continue
+                        compare(path, rel, st, old)
+                continue
+
+            listed += 1
+            old = old_files(rel)
+            try:
+                with os.scandir(self.__full(rel)) as it:
+                    entries = list(it)
+            except OSError:
+                entries = []
+            for entry in entries:
+                path = _join(rel, entry.name)
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in self.__exclude_dirs:
+                            stack.append(path)
+                        continue
+                    if not entry.is_file() or not self.__wanted(entry.name):
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue
+                compare(path, rel, st, old.pop(path, None))
+            for path in old:
+                deleted.append(path)
+                file_deletes.append((path,))
+
+        # 已不存在的目录，其中的文件全部删除
+        gone = [rel for rel in old_dirs if rel not in seen_dirs]
+        for rel in gone:
+            for path in old_files(rel):
+                deleted.append(path)
+                file_deletes.append((path,))
+
+        with db:
+            db.executemany("DELETE FROM files WHERE path = ?", file_deletes)
+            db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)", file_rows)
+            db.executemany("DELETE FROM dirs WHERE path = ?", [(rel,) for rel in gone])
+            db.executemany("INSERT OR REPLACE INTO dirs VALUES (?, ?)", dir_rows)
+
+        full = self.__full
+        return ScanResult({full(p) for p in added}, {full(p) for p in modified}, {full(p) for p in deleted},
+                          len(self), listed, skipped, time.time() - start)
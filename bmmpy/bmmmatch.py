@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+LICENSE  MulanPSL2
+@author  cnhemiya@qq.com
+@date    2026-10-17 10:20
+
+@brief 多模板、多尺度模板匹配，依赖 OpenCV。
+"""
+
+
+from typing import Optional
+import numpy as np
+import cv2
+from bmmpy.bmmcheck import typechecked
+from bmmpy import bmmimage
+
+
+class MatchHit:
+    """
+    一个匹配结果。
+
+    Attributes:
+        name (str): 模板名称。
+        top_left (tuple[int, int]): 左上角坐标 (x, y)。
+        bottom_right (tuple[int, int]): 右下角坐标 (x, y)。
+        score (float): 匹配分数，越大越匹配。
+        scale (float): 匹配到的模板缩放比例。
+    """
+
+    __slots__ = ("name", "top_left", "bottom_right", "score", "scale")
+
+    def __init__(self, name: str, top_left: tuple[int, int], bottom_right: tuple[int, int],
+                 score: float, scale: float):
+        self.name = name
+        self.top_left = top_left
+        self.bottom_right = bottom_right
+        self.score = score
+        self.scale = scale
+
+    @property
+    def center(self) -> tuple[int, int]:
+        """ 中心点坐标，可直接用于 AdbUtils.touch """
+        return ((self.top_left[0] + self.bottom_right[0]) // 2,
+                (self.top_left[1] + self.bottom_right[1]) // 2)
+
+    def __repr__(self):
+        return (f"MatchHit({self.name!r}, {self.top_left}, {self.bottom_right}, "
+                f"score={self.score:.3f}, scale={self.scale})")
+
+
+class _Template:
+    # 注册的模板，按尺度预先缩放好
+    def __init__(self, name, images, roi, threshold):
+        self.name = name
+        self.images = images
+        self.roi = roi
+        self.threshold = threshold
+
+
+@typechecked
+class TemplateMatcher:
+    """
+    多模板匹配引擎。
+    注册一组模板后，每帧只做一次灰度转换，然后在各模板的 ROI 内按各个尺度匹配，
+    返回所有超过阈值的结果，同一模板的重叠结果用非极大值抑制去掉。
+
+    Examples:
+        >>> matcher = TemplateMatcher(threshold=0.85, scales=(0.9, 1.0, 1.1))
+        >>> matcher.add("ok_button", cv2.imread("ok.png"), roi=(0, 1600, 1080, 740))
+        >>> matcher.add("close", cv2.imread("close.png"))
+        >>> for hit in matcher.match(frame):
+        ...     print(hit.name, hit.center, hit.score)
+    """
+
+    def __init__(self, method: int = cv2.TM_CCOEFF_NORMED, threshold: float = 0.8,
+                 scales: tuple[float, ...] = (1.0,), gray: bool = True, iou_threshold: float = 0.3):
+        """
+        Args:
+            method (int): 匹配方法，只支持 cv2.TM_CCOEFF_NORMED、cv2.TM_CCORR_NORMED、
+                cv2.TM_SQDIFF_NORMED，默认为 cv2.TM_CCOEFF_NORMED。
+            threshold (float): 默认的分数阈值，默认为 0.8。
+            scales (tuple[float, ...]): 默认的模板缩放比例，默认为 (1.0,)。
+            gray (bool): 是否转为灰度图匹配，默认为 True。
+            iou_threshold (float): 非极大值抑制的重叠比例，默认为 0.3。
+
+        Raises:
+            ValueError: 匹配方法不是归一化方法时抛出。
+        """
+        bmmimage._score_map(np.zeros((1, 1), np.float32), method)
+        self.__method = method
+        self.__threshold = threshold
+        self.__scales = scales
+        self.__gray = gray
+        self.__iou_threshold = iou_threshold
+        self.__templates = {}
+
+    def __len__(self) -> int:
+        return len(self.__templates)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.__templates
+
+    def names(self) -> list[str]:
+        """ 已注册的模板名称列表 """
+        return list(self.__templates)
+
+    def add(self, name: str, image: np.ndarray, roi: Optional[tuple[int, int, int, int]] = None,
+            threshold: Optional[float] = None, scales: Optional[tuple[float, ...]] = None) -> None:
+        """
+        注册模板，名称相同时替换。
+
+        Args:
+            name (str): 模板名称。
+            image (np.ndarray): 模板图像，彩色（BGR）或灰度。
+            roi (tuple[int, int, int, int], optional): 搜索区域 (x, y, width, height)，默认为整帧。
+            threshold (float, optional): 该模板的分数阈值，默认使用引擎的阈值。
+            scales (tuple[float, ...], optional): 该模板的缩放比例，默认使用引擎的比例。
+        """
+        if self.__gray and image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        images = []
+        for s in (scales if scales is not None else self.__scales):
+            if s == 1.0:
+                images.append((s, image))
+            else:
+                interpolation = cv2.INTER_AREA if s < 1.0 else cv2.INTER_LINEAR
+                images.append((s, cv2.resize(image, None, fx=s, fy=s, interpolation=interpolation)))
+        self.__templates[name] = _Template(name, images, roi,
+                                           threshold if threshold is not None else self.__threshold)
+
+    def remove(self, name: str) -> None:
+        """ 移除模板 """
+        del self.__templates[name]
+
+    def match(self, frame: np.ndarray, names: Optional[list[str]] = None) -> list[MatchHit]:
+        """
+        在一帧图像中匹配所有（或指定的）模板。
+
+        Args:
+            frame (np.ndarray): 帧图像，彩色（BGR）或灰度。
+            names (list[str], optional): 只匹配这些模板，默认为全部。
+
+        Returns:
+            list[MatchHit]: 所有超过阈值的结果，按分数从高到低排列。
+        """
+        if self.__gray and frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        hits = []
+        for name in (names if names is not None else self.__templates):
+            hits.extend(self.__match_template(frame, self.__templates[name]))
+        hits.sort(key=lambda hit: hit.score, reverse=True)
+        return hits
+
+    def match_best(self, frame: np.ndarray, names: Optional[list[str]] = None) -> dict[str, MatchHit]:
+        """
+        在一帧图像中匹配模板，每个模板只保留分数最高的结果。
+
+        Returns:
+            dict[str, MatchHit]: 找到的模板 {名称: 结果}，没找到的模板不在字典中。
+        """
+        best = {}
+        for hit in self.match(frame, names):
+            best.setdefault(hit.name, hit)
+        return best
+
+    def __match_template(self, frame, template):
+        ox, oy = 0, 0
+        if template.roi is not None:
+            x, y, w, h = template.roi
+            ox, oy = max(x, 0), max(y, 0)
+            frame = frame[oy:y + h, ox:x + w]
+
+        boxes, scores, scales = [], [], []
+        for s, image in template.images:
+            th, tw = image.shape[:2]
+            if th > frame.shape[0] or tw > frame.shape[1]:
+                continue
+            result = cv2.matchTemplate(frame, image, self.__method)
+            score = bmmimage._score_map(result, self.__method)
+            ys, xs = bmmimage._find_peaks(score, template.threshold, min(tw, th) // 4)
+            if xs.size == 0:
+                continue
+            boxes.append(np.stack([xs + ox, ys + oy, xs + ox + tw, ys + oy + th], axis=1))
+            scores.append(score[ys, xs])
+            scales.append(np.full(xs.size, s))
+        if not boxes:
+            return []
+
+        boxes = np.concatenate(boxes)
+        scores = np.concatenate(scores)
+        scales = np.concatenate(scales)
+        keep = bmmimage.non_max_suppression(boxes, scores, self.__iou_threshold)
+        return [MatchHit(template.name, (int(boxes[i, 0]), int(boxes[i, 1])),
+                         (int(boxes[i, 2]), int(boxes[i, 3])), float(scores[i]), float(scales[i]))
+                for i in keep]
@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+"""
+LICENSE  MulanPSL2
+@author  cnhemiya@qq.com
+@date    2026-10-17 14:30
+
+@brief 感知哈希（aHash、dHash、pHash）和哈希索引，用于截图去重和查找，依赖 OpenCV。
+"""
+
+
+import numpy as np
+import cv2
+from bmmpy.bmmcheck import typechecked
+
+
+# 哈希算法
+HASH_AHASH = "ahash"
+HASH_DHASH = "dhash"
+HASH_PHASH = "phash"
+
+_HASH_FUNCS = {}
+
+# 32x32 的 DCT-II 变换矩阵，pHash 用矩阵乘法批量计算
+_DCT_SIZE = 32
+_k = np.arange(_DCT_SIZE)
+_DCT = np.cos(np.pi * (2 * _k[None, :] + 1) * _k[:, None] / (2 * _DCT_SIZE)).astype(np.float32)
+
+# 每个字节中 1 的个数，numpy 没有 bitwise_count 时使用
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _thumbs(images, size):
+    # 统一转为灰度并缩小到 size=(width, height)，叠成 (N, height, width) 的 float32
+    out = np.empty((len(images), size[1], size[0]), dtype=np.float32)
+    for i, image in enumerate(images):
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        out[i] = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+    return out
+
+
+def _pack(bits):
+    # (N, 64) 的布尔数组打包为 (N,) 的 uint64，第一位为最高位
+    return np.packbits(bits.reshape(len(bits), 64), axis=1).view(">u8").reshape(-1).astype(np.uint64)
+
+
+def _ahash(images):
+    t = _thumbs(images, (8, 8))
+    return _pack(t > t.mean(axis=(1, 2), keepdims=True))
+
+
+def _dhash(images):
+    t = _thumbs(images, (9, 8))
+    return _pack(t[:, :, 1:] > t[:, :, :-1])
+
+
+def _phash(images):
+    t = _thumbs(images, (_DCT_SIZE, _DCT_SIZE))
+    low = (_DCT @ t @ _DCT.T)[:, :8, :8].reshape(len(t), 64)
+    # 中位数不含直流分量
+    median = np.median(low[:, 1:], axis=1, keepdims=True)
+    return _pack(low > median)
+
+
+_HASH_FUNCS[HASH_AHASH] = _ahash
+_HASH_FUNCS[HASH_DHASH] = _dhash
+_HASH_FUNCS[HASH_PHASH] = _phash
+
+
+def _popcount(x):
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(x)
+    return _POPCOUNT_TABLE[x.view(np.uint8).reshape(-1, 8)].sum(axis=1, dtype=np.uint8)
+
+
+@typechecked
+def hash_images(images: list[np.ndarray], method: str = HASH_PHASH) -> np.ndarray:
+    """
+    批量计算图像的 64 位感知哈希。
+
+    Args:
+        images (list[np.ndarray]): 图像列表，彩色（BGR）或灰度。
+        method (str): HASH_AHASH、HASH_DHASH 或 HASH_PHASH，默认为 HASH_PHASH。
+
+    Returns:
+        np.ndarray: 形状为 (N,) 的 uint64 哈希数组。
+
+    Raises:
+        ValueError: method 不支持时抛出。
+    """
+    func = _HASH_FUNCS.get(method)
+    if func is None:
+        raise ValueError(f"不支持的哈希算法: {method}")
+    if not images:
+        return np.empty(0, dtype=np.uint64)
+    return func(images)
+
+
+@typechecked
+def image_hash(image: np.ndarray, method: str = HASH_PHASH) -> int:
+    """
+    计算一张图像的 64 位感知哈希。
+
+    Args:
+        image (np.ndarray): 图像，彩色（BGR）或灰度。
+        method (str): HASH_AHASH、HASH_DHASH 或 HASH_PHASH，默认为 HASH_PHASH。
+
+    Returns:
+        int: 哈希值。
+
+    Examples:
+        >>> h = image_hash(cv2.imread("home.png"))
+        >>> print(f"{h:016x}")
+    """
+    return int(hash_images([image], method)[0])
+
+
+@typechecked
+def hamming_distance(hash1: int, hash2: int) -> int:
+    """
+    计算两个哈希的汉明距离（不同的位数）。
+
+    Args:
+        hash1 (int): 第一个哈希。
+        hash2 (int): 第二个哈希。
+
+    Returns:
+        int: 汉明距离，0 ~ 64。
+    """
+    return bin(hash1 ^ hash2).count("1")
+
+
+@typechecked
+class HashIndex:
+    """
+    感知哈希索引。
+    哈希保存在连续的 uint64 数组中，查询时对所有哈希做一次向量化的异或和位计数，
+    一百万个哈希的查询在毫秒级完成。
+
+    Examples:
+        >>> index = HashIndex()
+        >>> index.add_files(bmmfile.get_file_list("screens", True))
+        >>> index.query_image(frame, max_distance=6)
+        [('screens/home.png', 2)]
+    """
+
+    def __init__(self, method: str = HASH_PHASH):
+        """
+        Args:
+            method (str): HASH_AHASH、HASH_DHASH 或 HASH_PHASH，默认为 HASH_PHASH。
+        """
+        if method not in _HASH_FUNCS:
+            raise ValueError(f"不支持的哈希算法: {method}")
+        self.__method = method
+        self.__hashes = np.empty(1024, dtype=np.uint64)
+        self.__keys = []
+
+    def __len__(self) -> int:
+        return len(self.__keys)
+
+    @property
+    def method(self) -> str:
+        """ 哈希算法 """
+        return self.__method
+
+    @property
+    def hashes(self) -> np.ndarray:
+        """ 所有哈希，与 keys 一一对应，不要修改 """
+        return self.__hashes[:len(self.__keys)]
+
+    @property
+    def keys(self) -> list[str]:
+        """ 所有键 """
+        return self.__keys
+
+    def add_hashes(self, hashes: np.ndarray, keys: list[str]) -> None:
+        """
+        批量添加哈希。
+
+        Args:
+            hashes (np.ndarray): uint64 哈希数组。
+            keys (list[str]): 对应的键，如文件路径。
+        """
+        if len(hashes) != len(keys):
+            raise ValueError("哈希与键的数量不一致")
+        n = len(self.__keys)
+        need = n + len(keys)
+        if need > len(self.__hashes):
+            grown = np.empty(max(need, len(self.__hashes) * 2), dtype=np.uint64)
+            grown[:n] = self.__hashes[:n]
+            self.__hashes = grown
+        self.__hashes[n:need] = hashes
+        self.__keys.extend(keys)
+
+    def add_image(self, image: np.ndarray, key: str) -> int:
+        """
+        添加一张图像，返回它的哈希。
+        """
+        h = hash_images([image], self.__method)
+        self.add_hashes(h, [key])
+        return int(h[0])
+
+    def add_files(self, files: list[str], batch_size: int = 256) -> list[str]:
+        """
+        批量添加图像文件，如 bmmfile.get_file_list 的结果，以灰度读取，每 batch_size 张批量计算哈希。
+
+        Args:
+            files (list[str]): 图像文件路径列表。
+            batch_size (int): 每批数量，默认为 256。
+
+        Returns:
+            list[str]: 无法读取的文件列表。
+        """
+        failed = []
+        for start in range(0, len(files), batch_size):
+            images, keys = [], []
+            for f in files[start:start + batch_size]:
+                image = cv2.imread(f, cv2.IMREAD_GRAYSCALE)
+                if image is None:
+                    failed.append(f)
+                else:
+                    images.append(image)
+                    keys.append(f)
+            self.add_hashes(hash_images(images, self.__method), keys)
+        return failed
+
+    def distances(self, query_hash: int) -> np.ndarray:
+        """
+        计算一个哈希与索引中所有哈希的汉明距离。
+
+        Returns:
+            np.ndarray: 形状为 (N,) 的距离数组，与 keys 一一对应。
+        """
+        return _popcount(np.bitwise_xor(self.hashes, np.uint64(query_hash)))
+
+    def query(self, query_hash: int, max_distance: int = 8, k: int = 0) -> list[tuple[str, int]]:
+        """
+        查找汉明距离不超过 max_distance 的哈希。
+
+        Args:
+            query_hash (int): 要查找的哈希。
+            max_distance (int): 最大汉明距离，默认为 8。
+            k (int): 最多返回的数量，0 表示不限制。
+
+        Returns:
+            list[tuple[str, int]]: [(键, 距离)]，按距离从小到大排列。
+        """
+        d = self.distances(query_hash)
+        idx = np.nonzero(d <= max_distance)[0]
+        idx = idx[np.argsort(d[idx], kind="stable")]
+        if k > 0:
+            idx = idx[:k]
+        return [(self.__keys[i], int(d[i])) for i in idx]
+
+    def query_image(self, image: np.ndarray, max_distance: int = 8, k: int = 0) -> list[tuple[str, int]]:
+        """
+        查找与图像相似的记录，参数见 query。
+        """
+        return self.query(image_hash(image, self.__method), max_distance, k)
+
+    def find_duplicates(self, max_distance: int = 4) -> list[tuple[str, str, int]]:
+        """
+        查找索引内的近似重复，每对只返回一次。计算量与数量的平方成正比。
+
+        Returns:
+            list[tuple[str, str, int]]: [(键1, 键2, 距离)]。
+        """
+        hashes = self.hashes
+        result = []
+        for i in range(len(hashes) - 1):
+            d = _popcount(np.bitwise_xor(hashes[i + 1:], hashes[i]))
+            for j in np.nonzero(d <= max_distance)[0]:
+                result.append((self.__keys[i], self.__keys[i + 1 + j], int(d[j])))
+        return result
+
+    def save(self, path: str) -> None:
+        """ 保存索引为 .npz 文件 """
+        np.savez(path, hashes=self.hashes, keys=np.array(self.__keys, dtype=str),
+                 method=np.array(self.__method))
+
+    @staticmethod
+    def load(path: str) -> "HashIndex":
+        """ 从 .npz 文件读取索引 """
+        with np.load(path) as data:
+            index = HashIndex(str(data["method"]))
+            index.add_hashes(data["hashes"], [str(k) for k in data["keys"]])
+        return index
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+LICENSE  MulanPSL2
+@author  cnhemiya@qq.com
+@date    2026-10-17 15:10
+
+@brief 原始帧文件，固定长度的文件头加连续像素数据，读取为 numpy.memmap，不需要编解码。
+
+文件格式（小端）:
+    0   8 字节  魔数 b"BMMRAW01"
+    8   8 字节  numpy dtype 字符串，如 b"|u1"，不足补 0
+    16  4 字节  维数 ndim（1 ~ 4）
+    20  4 字节  保留
+    24  32 字节 形状，4 个 uint64，不足补 0
+    56  8 字节  保留
+    64  像素数据，C 顺序
+"""
+
+
+import struct
+import numpy as np
+from bmmpy.bmmcheck import typechecked
+
+
+RAW_EXTENSION = ".raw"
+RAW_MAGIC = b"BMMRAW01"
+RAW_HEADER_SIZE = 64
+
+_HEADER = struct.Struct("<8s8sII4Q8x")
+
+
+@typechecked
+def is_raw_frame(file_path: str) -> bool:
+    """
+    判断文件是否为原始帧文件。
+
+    Args:
+        file_path (str): 文件路径。
+
+    Returns:
+        bool: 文件存在且以魔数开头时为 True。
+    """
+    try:
+        with open(file_path, "rb") as f:
+            return f.read(len(RAW_MAGIC)) == RAW_MAGIC
+    except OSError:
+        return False
+
+
+@typechecked
+def write_raw_frame(file_path: str, image: np.ndarray) -> None:
+    """
+    把数组写入原始帧文件，像素数据直接从数组内存写出，不做编码和复制。
+
+    Args:
+        file_path (str): 文件路径，通常使用 RAW_EXTENSION 扩展名。
+        image (np.ndarray): 图像数组，1 ~ 4 维。
+
+    Raises:
+        ValueError: 维数不支持时抛出。
+
+    Examples:
+        >>> write_raw_frame("frame_0001.raw", frame)
+    """
+    if not 1 <= image.ndim <= 4:
+        raise ValueError(f"不支持的维数: {image.ndim}")
+    image = np.ascontiguousarray(image)
+    shape = list(image.shape) + [0] * (4 - image.ndim)
+    header = _HEADER.pack(RAW_MAGIC, image.dtype.str.encode("ascii"), image.ndim, 0, *shape)
+    with open(file_path, "wb") as f:
+        f.write(header)
+        f.write(memoryview(image).cast("B"))
+
+
+@typechecked
+def read_raw_frame(file_path: str, mode: str = "r") -> np.memmap:
+    """
+    把原始帧文件映射为数组，不复制数据。
+
+    Args:
+        file_path (str): 文件路径。
+        mode (str): 映射方式，"r" 只读、"r+" 读写、"c" 写时复制，默认为 "r"。
+
+    Returns:
+        np.memmap: 映射到文件的数组。
+
+    Raises:
+        ValueError: 文件不是原始帧文件时抛出。
+
+    Examples:
+        >>> frame = read_raw_frame("frame_0001.raw")
+        >>> edges = bmmimage.image_to_edges(frame)
+    """
+    with open(file_path, "rb") as f:
+        header = f.read(RAW_HEADER_SIZE)
+    if len(header) != RAW_HEADER_SIZE or header[:len(RAW_MAGIC)] != RAW_MAGIC:
+        raise ValueError(f"不是原始帧文件: {file_path}")
+    magic, dtype, ndim, _, *shape = _HEADER.unpack(header)
+    return np.memmap(file_path, dtype=np.dtype(dtype.rstrip(b"\0").decode("ascii")), mode=mode,
+                     offset=RAW_HEADER_SIZE, shape=tuple(shape[:ndim]))
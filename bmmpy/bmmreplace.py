@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+LICENSE  MulanPSL2
+@author  cnhemiya@qq.com
+@date    2026-10-17 17:20
+
+@brief 目录树中批量查找替换文本，多进程并行。
+
+命令行用法:
+    python -m bmmpy.bmmreplace src/ map.json --include "*.py" --exclude ".git" -j 8
+    python -m bmmpy.bmmreplace src/ map.json --dry-run
+map.json 为 {"text_old1": "text_new1", "text_old2": "text_new2"}。
+"""
+
+
+import os
+import sys
+import json
+import time
+import difflib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Union
+from bmmpy import bmmfile
+from bmmpy import bmmstring
+from bmmpy.bmmcheck import typechecked
+
+
+# 不超过此大小的文件先整体读入做预过滤，更大的文件直接分块替换
+PREFILTER_MAX_BYTES = 64 * 1024 * 1024
+
+# 键少于此数量时用字节子串查找预过滤，否则用编译好的正则
+_SUBSTRING_KEYS = 16
+
+# 工作进程内的参数和编译好的替换器
+_params = None
+_replacer = None
+_byte_keys = None
+
+
+def _plain_encoding(encoding):
+    # 编码没有 BOM 等前缀时，键编码后的字节一定出现在文件的字节中
+    one = "a".encode(encoding)
+    return "aa".encode(encoding) == one + one
+
+
+def _init_worker(params):
+    global _params, _replacer, _byte_keys
+    _params = params
+    _replacer = bmmstring.get_replacer(params["str_dict"])
+    _byte_keys = None
+    keys = list(_replacer.str_dict)
+    if len(keys) < _SUBSTRING_KEYS and _plain_encoding(params["encoding"]):
+        _byte_keys = [k.encode(params["encoding"]) for k in keys]
+
+
+def _process(path):
+    # 返回 (替换次数, dry_run 时的 diff)
+    p = _params
+    if _replacer.pattern is None:
+        return 0, ""
+    if os.path.getsize(path) <= PREFILTER_MAX_BYTES:
+        with open(path, "rb") as f:
+            data = f.read()
+        if _byte_keys is not None and not any(k in data for k in _byte_keys):
+            return 0, ""
+        text = data.decode(p["encoding"])
+        if _byte_keys is None and _replacer.pattern.search(text) is None:
+            return 0, ""
+        if p["dry_run"]:
+            result, count = _replacer.subn(text)
+            diff = "".join(difflib.unified_diff(text.splitlines(True), result.splitlines(True),
+                                                path, path, n=p["context"]))
+            return count, diff
+    elif p["dry_run"]:
+        text = bmmfile.read_text(path, p["encoding"])
+        result, count = _replacer.subn(text)
+        return count, f"--- {path}\n+++ {path}\n@@ 文件过大，省略 diff，共 {count} 处替换 @@\n" if count else ""
+    return bmmfile.replace_text_in_file(path, p["str_dict"], p["encoding"]), ""
+
+
+def _safe_process(path):
+    # executor.map 遇到异常会中断，这里把异常作为结果返回
+    try:
+        return _process(path)
+    except Exception as e:
+        return e
+
+
+@typechecked
+def collect_files(root: str, include: Union[str, list[str]] = "*",
+                  exclude: Union[str, list[str], None] = None) -> list[str]:
+    """
+    收集目录树中的文件，见 bmmfile.walk_files。
+    通配符匹配相对 root 的路径（分隔符为 "/"），用 fnmatch 规则，"*" 可以匹配 "/"，
+    因此 "*.py" 匹配所有层级的 .py 文件。exclude 匹配到名称或相对路径的目录整个跳过。
+
+    Args:
+        root (str): 根目录。
+        include (str | list[str]): 包含的文件，默认为 "*" 全部文件。
+        exclude (str | list[str], optional): 排除的文件或目录，如 [".git", "*/build/*"]。
+
+    Returns:
+        list[str]: 文件路径列表，已排序。
+
+    Examples:
+        >>> collect_files("src", "*.py", [".git", "*/tests/*"])
+        ['src/a.py', 'src/pkg/b.py']
+    """
+    return sorted(bmmfile.walk_files(root, patterns=include, exclude=exclude, exclude_dirs=exclude))
+
+
+@typechecked
+def replace_in_files(src: Union[str, list[str]], str_dict: dict[str, str],
+                     include: Union[str, list[str]] = "*", exclude: Union[str, list[str], None] = None,
+                     encoding: str = "utf-8", processes: Optional[int] = None,
+                     dry_run: bool = False, context: int = 3) -> dict:
+    """
+    在目录树的所有文件中替换文本，多进程并行。
+    替换规则与 bmmstring.replace_string_by_dict 相同（单遍，不级联），每个进程只编译一次；
+    先用子串查找预过滤，没有任何键的文件不解码也不改写。写入方式见 bmmfile.replace_text_in_file。
+
+    Args:
+        src (str | list[str]): 根目录，或文件列表（此时忽略 include 和 exclude）。
+        str_dict (dict[str, str]): 字符串字典，格式为 {"text_old1": "text_new1", "text_old2": "text_new2"}。
+        include (str | list[str]): 包含的文件，见 collect_files，默认为 "*"。
+        exclude (str | list[str], optional): 排除的文件或目录，见 collect_files。
+        encoding (str): 文件编码，默认为 "utf-8"。
+        processes (int, optional): 进程数，默认为 CPU 数量，1 表示在当前进程中处理。
+        dry_run (bool): 只统计和生成 diff，不修改文件，默认为 False。
+        context (int): diff 的上下文行数，默认为 3。
+
+    Returns:
+        dict: 统计信息 {"total", "changed", "replacements", "failed", "seconds", "files", "diffs", "errors"}，
+            files 为 {文件: 替换次数}（只含有替换的文件），diffs 为 {文件: unified diff}（只在 dry_run 时），
+            errors 为 {文件: 错误信息}。
+
+    Examples:
+        >>> stats = replace_in_files("src", {"old_name": "new_name"}, "*.py", dry_run=True)
+        >>> print("".join(stats["diffs"].values()))
+    """
+    start = time.perf_counter()
+    files = collect_files(src, include, exclude) if isinstance(src, str) else list(src)
+    params = {"str_dict": str_dict, "encoding": encoding, "dry_run": dry_run, "context": context}
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    counts = {}
+    diffs = {}
+    errors = {}
+    if processes == 1 or len(files) <= 1:
+        _init_worker(params)
+        results = zip(files, map(_safe_process, files))
+        executor = None
+    else:
+        chunksize = max(1, min(64, len(files) // (processes * 8)))
+        executor = ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(params,))
+        results = zip(files, executor.map(_safe_process, files, chunksize=chunksize))
+    try:
+        for f, result in results:
+            if isinstance(result, Exception):
+                errors[f] = str(result)
+            elif result[0]:
+                counts[f] = result[0]
+                if dry_run:
+                    diffs[f] = result[1]
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return {"total": len(files), "changed": len(counts), "replacements": sum(counts.values()),
+            "failed": len(errors), "seconds": time.perf_counter() - start,
+            "files": counts, "diffs": diffs, "errors": errors}
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """ 命令行入口 """
+    parser = argparse.ArgumentParser(prog="python -m bmmpy.bmmreplace", description="目录树中批量查找替换文本")
+    parser.add_argument("root", help="根目录")
+    parser.add_argument("dict_file", help="替换字典 JSON 文件，{\"旧文本\": \"新文本\"}")
+    parser.add_argument("--include", action="append", help="包含的文件，可多次指定，默认全部")
+    parser.add_argument("--exclude", action="append", help="排除的文件或目录，可多次指定")
+    parser.add_argument("--encoding", default="utf-8", help="文件编码，默认 utf-8")
+    parser.add_argument("-j", "--processes", type=int, default=None, help="进程数，默认 CPU 数量")
+    parser.add_argument("-n", "--dry-run", action="store_true", help="只显示 diff，不修改文件")
+    args = parser.parse_args(argv)
+
+    with open(args.dict_file, "r", encoding="utf-8") as f:
+        str_dict = json.load(f)
+    stats = replace_in_files(args.root, str_dict, args.include or "*", args.exclude,
+                             encoding=args.encoding, processes=args.processes, dry_run=args.dry_run)
+    for diff in stats["diffs"].values():
+        sys.stdout.write(diff)
+    for path, count in stats["files"].items():
+        print(f"{count:>8}  {path}", file=sys.stderr)
+    for path, msg in stats["errors"].items():
+        print(f"失败: {path}: {msg}", file=sys.stderr)
+    print(f"共 {stats['total']} 个文件，{stats['changed']} 个有替换，共 {stats['replacements']} 处，"
+          f"失败 {stats['failed']}，用时 {stats['seconds']:.2f} 秒", file=sys.stderr)
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,17 +8,153 @@ LICENSE  MulanPSL2
 """
 
 
-from typeguard import typechecked
+import re
+import functools
+from typing import Optional
+from bmmpy.bmmcheck import typechecked
+
+
+# get_replacer 缓存的替换器数量
+REPLACER_CACHE_SIZE = 32
+
+
+def _trie_regex(keys):
+    # 把所有键建成前缀树，再转为正则，例如 ["ab", "abc", "ad"] -> a(?:b(?:c)?|d)
+    # 可选部分是贪婪的，同一位置总是匹配最长的键；比按长度排序的简单分支快得多
+    root = {}
+    for key in keys:
+        node = root
+        for ch in key:
+            node = node.setdefault(ch, {})
+        node[""] = None
+
+    def build(node):
+        pieces = []
+        # 没有分支的部分直接连接，减少递归深度
+        while len(node) == 1 and "" not in node:
+            ch, node = next(iter(node.items()))
+            pieces.append(re.escape(ch))
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch != ""]
+        if alts:
+            body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+            pieces.append(f"(?:{body})?" if "" in node else body)
+        return "".join(pieces)
+
+    return build(root)
+
+
+@typechecked
+class StringReplacer:
+    """
+    多个字符串的单遍替换器。
+    所有键编译为一个正则，从左到右扫描一遍，每个位置替换最长的键，替换结果不会再被其他键替换。
+    空字符串键被忽略。
+
+    Examples:
+        >>> replacer = StringReplacer({"a": "b", "b": "a"})
+        >>> replacer.replace("abba")
+        'baab'
+        >>> replacer.subn("abc")
+        ('bac', 2)
+    """
+
+    def __init__(self, str_dict: dict[str, str]):
+        """
+        Args:
+            str_dict (dict[str, str]): 字符串字典，格式为 {"str_old1": "str_new1", "str_old2": "str_new2"}
+        """
+        self.__dict = {k: v for k, v in str_dict.items() if k}
+        self.__max_key_length = max(map(len, self.__dict), default=0)
+        if not self.__dict:
+            self.__pattern = None
+            return
+        try:
+            self.__pattern = re.compile(_trie_regex(self.__dict))
+        except (RecursionError, re.error):
+            # 分支极深的超长键，退回按长度从长到短排列的分支
+            keys = sorted(self.__dict, key=len, reverse=True)
+            self.__pattern = re.compile("|".join(map(re.escape, keys)))
+
+    def __len__(self) -> int:
+        return len(self.__dict)
+
+    @property
+    def pattern(self) -> Optional[re.Pattern]:
+        """ 编译后的正则，没有键时为 None """
+        return self.__pattern
+
+    @property
+    def str_dict(self) -> dict[str, str]:
+        """ 去掉空字符串键后的字符串字典，不要修改 """
+        return self.__dict
+
+    @property
+    def max_key_length(self) -> int:
+        """ 最长的键的长度 """
+        return self.__max_key_length
+
+    def __lookup(self, match):
+        return self.__dict[match.group()]
+
+    def replace(self, string_: str) -> str:
+        """
+        替换字符串。
+
+        Args:
+            string_ (str): 要替换的原始字符串
+
+        Returns:
+            str: 替换后的字符串
+        """
+        if self.__pattern is None:
+            return string_
+        return self.__pattern.sub(self.__lookup, string_)
+
+    def subn(self, string_: str) -> tuple[str, int]:
+        """
+        替换字符串，同时返回替换次数。
+
+        Args:
+            string_ (str): 要替换的原始字符串
+
+        Returns:
+            tuple[str, int]: (替换后的字符串, 替换次数)
+        """
+        if self.__pattern is None:
+            return string_, 0
+        return self.__pattern.subn(self.__lookup, string_)
+
+
+@functools.lru_cache(maxsize=REPLACER_CACHE_SIZE)
+def _cached_replacer(items):
+    return StringReplacer(dict(items))
+
+
+@typechecked
+def get_replacer(str_dict: dict[str, str]) -> StringReplacer:
+    """
+    获取字符串字典对应的替换器，相同内容的字典只编译一次。
+
+    Args:
+        str_dict (dict[str, str]): 字符串字典
+
+    Returns:
+        StringReplacer: 替换器，不要修改
+    """
+    return _cached_replacer(tuple(str_dict.items()))
 
 
 @typechecked
-def replace_string_by_dict(string_: str, str_dict: dict[str, str]) -> str:
+def replace_string_by_dict(string_: str, str_dict: dict[str, str], cascade: bool = False) -> str:
     """
     根据提供的字符串字典替换文本。
+    默认从左到右扫描一遍，每个位置替换最长的键，替换结果不会被其他键再次替换；
+    cascade 为 True 时按字典顺序对每个键依次调用 str.replace，后面的键会替换前面替换出来的文本。
 
     Args:
         string_ (str): 要替换的原始字符串
         str_dict (dict[str, str]): 字符串字典，格式为 {"str_old1": "str_new1", "str_old2": "str_new2"}
+        cascade (bool): 是否依次替换（旧的行为），默认为 False
 
     Returns:
         str: 替换后的字符串
@@ -32,10 +168,16 @@ def replace_string_by_dict(string_: str, str_dict: dict[str, str]) -> str:
         'Hello Python'
         >>> replace_string_by_dict("abc def ghi", {"abc": "123", "def": "456"})
         '123 456 ghi'
+        >>> replace_string_by_dict("ab", {"a": "b", "b": "c"})
+        'bc'
+        >>> replace_string_by_dict("ab", {"a": "b", "b": "c"}, cascade=True)
+        'cc'
     """
-    for key in str_dict:
-        string_ = string_.replace(key, str_dict[key])
-    return string_
+    if cascade:
+        for key in str_dict:
+            string_ = string_.replace(key, str_dict[key])
+        return string_
+    return get_replacer(str_dict).replace(string_)
 
 
 @typechecked
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+LICENSE  MulanPSL2
+@author  cnhemiya@qq.com
+@date    2026-10-17 11:05
+
+@brief 模板库，缓存预处理后的模板图像，依赖 OpenCV。
+"""
+
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+import numpy as np
+import cv2
+from bmmpy.bmmcheck import typechecked
+from bmmpy import bmmfile
+from bmmpy import bmmimage
+
+
+# 模板预处理方式
+MODE_COLOR = "color"    # BGR 彩色
+MODE_GRAY = "gray"      # 灰度
+MODE_EDGES = "edges"    # 灰度后提取边缘
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".webp")
+
+
+@typechecked
+class TemplateLibrary:
+    """
+    模板库。
+    从目录加载模板，按 mode 预处理（彩色、灰度、边缘）并可选缩小，
+    结果按最近最少使用（LRU）缓存，超过内存上限时淘汰最久未用的模板。
+    文件修改时间变化时自动重新加载；预处理结果可保存为 .npz，下次启动直接读取。
+    模板名称为相对目录的路径去掉扩展名，分隔符为 "/"，如 "home/ok_button"。
+
+    Examples:
+        >>> lib = TemplateLibrary("templates", mode=MODE_GRAY, cache_path="templates.npz")
+        >>> lib.load_cache()
+        >>> top_left, bottom_right = lib.match(frame_gray, "home/ok_button")
+        >>> lib.save_cache()
+    """
+
+    def __init__(self, dir_name: str, mode: str = MODE_GRAY, scale: float = 1.0,
+                 max_bytes: int = 256 * 1024 * 1024, check_mtime: bool = True,
+                 cache_path: Optional[str] = None):
+        """
+        Args:
+            dir_name (str): 模板目录，包含子目录。
+            mode (str): 预处理方式，MODE_COLOR、MODE_GRAY 或 MODE_EDGES，默认为 MODE_GRAY。
+            scale (float): 缩放比例，默认为 1.0 不缩放。
+            max_bytes (int): 缓存的内存上限（字节），默认为 256MB。
+            check_mtime (bool): 每次读取模板时是否检查文件修改时间，默认为 True。
+            cache_path (str, optional): .npz 缓存文件路径，没有 .npz 扩展名时自动加上（与 np.savez 一致）。
+
+        Raises:
+            ValueError: mode 不支持时抛出。
+        """
+        if mode not in (MODE_COLOR, MODE_GRAY, MODE_EDGES):
+            raise ValueError(f"不支持的模板预处理方式: {mode}")
+        self.__dir = dir_name
+        self.__mode = mode
+        self.__scale = scale
+        self.__max_bytes = max_bytes
+        self.__check_mtime = check_mtime
+        self.__cache_path = self.__npz_path(cache_path)
+        self.__paths = {}
+        self.__cache = OrderedDict()
+        self.__bytes = 0
+        self.__lock = threading.Lock()
+        self.rescan()
+
+    def __len__(self) -> int:
+        return len(self.__paths)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.__paths
+
+    @property
+    def cached_bytes(self) -> int:
+        """ 当前缓存占用的字节数 """
+        return self.__bytes
+
+    def names(self) -> list[str]:
+        """ 模板名称列表 """
+        return sorted(self.__paths)
+
+    def rescan(self) -> None:
+        """ 重新扫描模板目录，删除已不存在的模板的缓存 """
+        paths = {}
+        for path in bmmfile.walk_files(self.__dir, extensions=IMAGE_EXTENSIONS):
+            name = os.path.relpath(os.path.splitext(path)[0], self.__dir).replace(os.sep, "/")
+            paths[name] = path
+        with self.__lock:
+            self.__paths = paths
+            for name in [n for n in self.__cache if n not in paths]:
+                self.__drop(name)
+
+    @staticmethod
+    def __npz_path(cache_path):
+        if cache_path is not None and not cache_path.endswith(".npz"):
+            cache_path += ".npz"
+        return cache_path
+
+    def __drop(self, name):
+        mtime, image = self.__cache.pop(name)
+        self.__bytes -= image.nbytes
+
+    def __put(self, name, mtime, image):
+        if name in self.__cache:
+            self.__drop(name)
+        self.__cache[name] = (mtime, image)
+        self.__bytes += image.nbytes
+        while self.__bytes > self.__max_bytes and len(self.__cache) > 1:
+            self.__drop(next(iter(self.__cache)))
+
+    def __load(self, path):
+        flag = cv2.IMREAD_COLOR if self.__mode == MODE_COLOR else cv2.IMREAD_GRAYSCALE
+        image = cv2.imread(path, flag)
+        if image is None:
+            raise ValueError(f"无法读取图像文件: {path}")
+        if self.__scale != 1.0:
+            image = cv2.resize(image, None, fx=self.__scale, fy=self.__scale,
+                               interpolation=cv2.INTER_AREA)
+        if self.__mode == MODE_EDGES:
+            image = bmmimage.image_to_edges(image, user_gray=False)
+        return image
+
+    def get(self, name: str) -> np.ndarray:
+        """
+        获取预处理后的模板，返回的数组不要修改。
+
+        Args:
+            name (str): 模板名称。
+
+        Returns:
+            np.ndarray: 预处理后的模板图像。
+
+        Raises:
+            KeyError: 模板不存在时抛出。
+            ValueError: 模板文件无法读取时抛出。
+        """
+        path = self.__paths[name]
+        with self.__lock:
+            item = self.__cache.get(name)
+            if item is not None and not self.__check_mtime:
+                self.__cache.move_to_end(name)
+                return item[1]
+        mtime = os.stat(path).st_mtime_ns
+        with self.__lock:
+            item = self.__cache.get(name)
+            if item is not None and item[0] == mtime:
+                self.__cache.move_to_end(name)
+                return item[1]
+        image = self.__load(path)
+        with self.__lock:
+            self.__put(name, mtime, image)
+        return image
+
+    def load_all(self) -> None:
+        """ 预先加载所有模板，受内存上限限制 """
+        for name in self.names():
+            self.get(name)
+
+    def match(self, src_image: np.ndarray, name: str, method: int = cv2.TM_CCOEFF_NORMED
+              ) -> tuple[tuple[int, int], tuple[int, int]]:
+        """
+        用模板库中的模板进行匹配，src_image 需要与模板预处理方式一致（如同为灰度图）。
+
+        Args:
+            src_image (np.ndarray): 源图像。
+            name (str): 模板名称。
+            method (int): 匹配方法，默认为 cv2.TM_CCOEFF_NORMED。
+
+        Returns:
+            tuple: 匹配结果的位置 (top_left, bottom_right)。
+        """
+        return bmmimage.image_match(src_image, self.get(name), method)
+
+    def save_cache(self, cache_path: Optional[str] = None) -> None:
+        """
+        把当前缓存的模板保存为 .npz 文件。
+
+        Args:
+            cache_path (str, optional): 缓存文件路径，默认使用构造时的 cache_path。
+
+        Raises:
+            ValueError: 没有指定缓存文件路径时抛出。
+        """
+        cache_path = self.__npz_path(cache_path) or self.__cache_path
+        if cache_path is None:
+            raise ValueError("没有指定模板缓存文件路径 cache_path")
+        with self.__lock:
+            items = list(self.__cache.items())
+        arrays = {f"image_{i}": image for i, (name, (mtime, image)) in enumerate(items)}
+        np.savez(cache_path, names=np.array([name for name, item in items], dtype=str),
+                 mtimes=np.array([item[0] for name, item in items], dtype=np.int64),
+                 mode=np.array(self.__mode), scale=np.array(self.__scale), **arrays)
+
+    def load_cache(self, cache_path: Optional[str] = None) -> int:
+        """
+        从 .npz 文件读取预处理好的模板，跳过文件已修改或设置不一致的模板。
+
+        Args:
+            cache_path (str, optional): 缓存文件路径，默认使用构造时的 cache_path。
+
+        Returns:
+            int: 读取的模板数量，缓存文件不存在时为 0。
+        """
+        cache_path = self.__npz_path(cache_path) or self.__cache_path
+        if cache_path is None or not os.path.isfile(cache_path):
+            return 0
+        count = 0
+        with np.load(cache_path) as data:
+            if str(data["mode"]) != self.__mode or float(data["scale"]) != self.__scale:
+                return 0
+            for i, (name, mtime) in enumerate(zip(data["names"], data["mtimes"])):
+                name = str(name)
+                path = self.__paths.get(name)
+                if path is None or os.stat(path).st_mtime_ns != int(mtime):
+                    continue
+                with self.__lock:
+                    self.__put(name, int(mtime), data[f"image_{i}"])
+                count += 1
+        return count
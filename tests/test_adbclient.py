@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+LICENSE  MulanPSL2
+@author  cnhemiya@qq.com
+@date    2026-10-17 19:20
+
+@brief AdbClient 和 AdbUtils socket 传输的测试，用本地替身 server 代替 adb server，
+shell: / exec: 请求在本机 /bin/sh 中执行，sync: 请求读写本机文件。
+"""
+
+
+import os
+import socketserver
+import struct
+import subprocess
+import threading
+import pytest
+from bmmpy.adbhelper import adbutils
+from bmmpy.adbhelper.adbclient import AdbClient
+from bmmpy.adbhelper.adbutils import AdbUtils, TRANSPORT_SOCKET
+
+
+class _Handler(socketserver.BaseRequestHandler):
+
+    def recvExactly(self, size):
+        data = b""
+        while len(data) < size:
+            chunk = self.request.recv(size - len(data))
+            if not chunk:
+                raise EOFError
+            data += chunk
+        return data
+
+    def reply(self, status, payload=None):
+        msg = status if payload is None else status + b"%04x" % len(payload) + payload
+        self.request.sendall(msg)
+
+    def handle(self):
+        while True:
+            try:
+                size = int(self.recvExactly(4), 16)
+                request = self.recvExactly(size).decode()
+            except (EOFError, ValueError):
+                return
+            if request == "host:version":
+                return self.reply(b"OKAY", b"0029")
+            if request == "host:devices":
+                return self.reply(b"OKAY", b"emu-1\tdevice\nemu-2\toffline\n")
+            if request.startswith("host:transport"):
+                if request.endswith(":bad"):
+                    return self.reply(b"FAIL", b"device not found")
+                self.reply(b"OKAY")
+                continue
+            if request.startswith(("shell:", "exec:")):
+                self.reply(b"OKAY")
+                out = subprocess.run(["/bin/sh", "-c", request.split(":", 1)[1]],
+                                     capture_output=True).stdout
+                if request.startswith("shell:"):
+                    out = out.replace(b"\n", b"\r\n")
+                return self.request.sendall(out)
+            if request == "sync:":
+                self.reply(b"OKAY")
+                return self.handleSync()
+            return self.reply(b"FAIL", b"unknown request")
+
+    def handleSync(self):
+        while True:
+            try:
+                sync_id = self.recvExactly(4)
+            except EOFError:
+                return
+            size = struct.unpack("<I", self.recvExactly(4))[0]
+            if sync_id == b"QUIT":
+                return
+            path = self.recvExactly(size).decode()
+            if sync_id == b"STAT":
+                try:
+                    st = os.stat(path)
+                    values = (st.st_mode, st.st_size, int(st.st_mtime))
+                except OSError:
+                    values = (0, 0, 0)
+                self.request.sendall(b"STAT" + struct.pack("<III", *values))
+            elif sync_id == b"RECV":
+                with open(path, "rb") as f:
+                    data = f.read()
+                for i in range(0, len(data), 1000):
+                    part = data[i:i + 1000]
+                    self.request.sendall(b"DATA" + struct.pack("<I", len(part)) + part)
+                self.request.sendall(b"DONE" + struct.pack("<I", 0))
+            elif sync_id == b"SEND":
+                path = path.rsplit(",", 1)[0]
+                data = b""
+                while True:
+                    part_id = self.recvExactly(4)
+                    part_size = struct.unpack("<I", self.recvExactly(4))[0]
+                    if part_id == b"DONE":
+                        break
+                    data += self.recvExactly(part_size)
+                with open(path, "wb") as f:
+                    f.write(data)
+                self.request.sendall(b"OKAY" + struct.pack("<I", 0))
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+@pytest.fixture
+def server():
+    srv = _Server(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv.server_address[1]
+    srv.shutdown()
+    srv.server_close()
+
+
+@pytest.fixture
+def client(server):
+    with AdbClient(port=server, timeout=5) as c:
+        yield c
+
+
+def test_host_commands(client):
+    assert client.hostCommand("host:version") == "0029"
+    assert client.devices() == [["emu-1", "device"], ["emu-2", "offline"]]
+
+
+def test_fail_raises(client):
+    with pytest.raises(RuntimeError, match="device not found"):
+        client.shell("bad", "echo hi")
+
+
+def test_shell_and_exec(client):
+    assert client.shell("emu-1", "echo hi") == b"hi\r\n"
+    assert client.execOut("emu-1", "printf '\\001\\n'") == b"\x01\n"
+
+
+def test_request_too_long(client):
+    with pytest.raises(ValueError):
+        client.shell("emu-1", "echo " + "x" * AdbClient.REQUEST_MAX)
+
+
+def test_sync(client, tmp_path):
+    src = tmp_path / "src.bin"
+    src.write_bytes(os.urandom(150000))
+    remote = str(tmp_path / "remote.bin")
+    client.push("emu-1", str(src), remote)
+    assert client.stat("emu-1", remote)[1] == 150000
+    client.pushData("emu-1", b"abc", remote)
+    client.pull("emu-1", remote, str(tmp_path / "back.bin"))
+    assert (tmp_path / "back.bin").read_bytes() == b"abc"
+    assert client.stat("emu-1", str(tmp_path / "missing"))[0] == 0
+
+
+def test_utils_socket_transport(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(adbutils, "SCRIPT_DIR", str(tmp_path))
+    adb = AdbUtils("", "emu-1", encoding="utf8", line_char="\n", transport=TRANSPORT_SOCKET,
+                   server_port=server)
+    try:
+        assert adb.shell("echo hi") == "hi\n"
+        assert adb.deviceList() == [["emu-1", "device"], ["emu-2", "offline"]]
+        # 超过请求长度上限的脚本经 sync 推送后执行，执行后删除
+        script = "\n".join("echo line%d >/dev/null" % i for i in range(4000)) + "\necho done"
+        assert adb.shellScript(script) == "done\n"
+        assert os.listdir(tmp_path) == []
+    finally:
+        adb.close()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+LICENSE  MulanPSL2
+@author  cnhemiya@qq.com
+@date    2026-10-17 19:00
+
+@brief AdbShellSession 和 AdbUtils 会话传输的测试，用运行 /bin/sh 的假 adb 脚本代替设备。
+"""
+
+
+import stat
+import pytest
+from bmmpy.adbhelper.adbsession import AdbShellSession
+from bmmpy.adbhelper.adbutils import AdbUtils, TRANSPORT_POPEN, TRANSPORT_SESSION
+
+
+FAKE_ADB = """#!/bin/sh
+if [ "$1" = "-s" ]; then shift 2; fi
+if [ "$1" = "shell" ]; then
+    shift
+    if [ $# -eq 0 ]; then exec /bin/sh; fi
+    exec /bin/sh -c "$*"
+fi
+echo "fake adb: $*"
+"""
+
+
+@pytest.fixture
+def fake_adb(tmp_path):
+    path = tmp_path / "adb"
+    path.write_text(FAKE_ADB)
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return str(path)
+
+
+@pytest.fixture
+def session(fake_adb):
+    with AdbShellSession(fake_adb, "emu-1", timeout=5) as s:
+        yield s
+
+
+def test_run_output_and_code(session):
+    assert session.run("echo hello") == ("hello\n", 0)
+    assert session.run("printf 'a\\nb\\n'; exit 3") == ("a\nb\n", 3)
+    assert session.run("true") == ("", 0)
+
+
+def test_commands_do_not_share_state(session):
+    start = session.run("pwd")[0]
+    session.run("cd /")
+    assert session.run("pwd")[0] == start
+    session.run("set -e")
+    assert session.run("false; echo still")[0] == "still\n"
+
+
+def test_exit_keeps_session(session):
+    assert session.run("exit 7") == ("", 7)
+    assert session.isAlive()
+    assert session.run("echo ok") == ("ok\n", 0)
+
+
+def test_stderr_discarded(session):
+    assert session.run("echo out; echo err >&2") == ("out\n", 0)
+
+
+def test_stdin_not_consumed(session):
+    assert session.run("cat") == ("", 0)
+    assert session.run("echo next") == ("next\n", 0)
+
+
+def test_reconnect_after_close(session):
+    session.run("echo a")
+    session.close()
+    assert not session.isAlive()
+    assert session.run("echo b") == ("b\n", 0)
+
+
+def test_timeout_closes_session(session):
+    with pytest.raises(TimeoutError):
+        session.run("sleep 2", timeout=0.2)
+    assert session.run("echo back") == ("back\n", 0)
+
+
+def test_session_matches_popen(fake_adb):
+    popen = AdbUtils(fake_adb, "emu-1", transport=TRANSPORT_POPEN)
+    adb = AdbUtils(fake_adb, "emu-1", transport=TRANSPORT_SESSION)
+    try:
+        for cmd in ("echo hello", "ls /nonexistent-bmm", "exit 1"):
+            assert adb.shell(cmd) == popen.shell(cmd), cmd
+        adb.shell("cd /")
+        assert adb.shell("pwd") == popen.shell("pwd")
+    finally:
+        adb.close()